@@ -0,0 +1,210 @@
+import os
+import gzip
+import time
+import shutil
+import tarfile
+import zipfile
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Iterable
+
+from background_task import CancelToken
+from copy_engine import CopyResult, DEFAULT_WORKERS, DEFAULT_DURABILITY, CHUNK_SIZE, temp_path, commit_file
+from merge_events import EventBus
+
+# 출력 형식과 파일 확장자 (긴 확장자부터 비교)
+ARCHIVE_SUFFIXES = {
+    ".tar.gz": "tar.gz", ".tgz": "tar.gz",
+    ".tar.zst": "tar.zst", ".tzst": "tar.zst",
+    ".tar": "tar",
+    ".zip": "zip",
+}
+ARCHIVE_FORMATS = ("zip", "tar", "tar.gz", "tar.zst")
+GZIP_BLOCK_SIZE = 1024 * 1024  # tar.gz에서 스레드 하나가 독립적으로 압축하는 블록 크기
+DEFAULT_LEVEL = 6  # 압축 수준 (zip/gzip 기준, zstd는 ZSTD_LEVEL 사용)
+ZSTD_LEVEL = 3
+
+
+class ArchiveFormatError(ValueError):
+    """알 수 없는 압축 형식이거나 형식에 필요한 패키지가 없을 때 발생"""
+
+
+class ArchiveMemberError(OSError):
+    """멤버를 쓰는 도중 원본을 읽지 못해(파일이 줄어듦, 읽기 오류 등) 압축 파일 전체를 중단할 때 발생"""
+
+    def __init__(self, source: Path, new_name: str, error: OSError):
+        super().__init__(f"{source} -> {new_name}를 압축 파일에 쓰는 중 오류가 나서 중단했습니다: {error}")
+        self.source = source
+        self.new_name = new_name
+
+
+def archive_format(path: Path) -> str:
+    """파일 이름의 확장자로 압축 형식을 결정"""
+    name = Path(path).name.lower()
+    for suffix, archive_type in ARCHIVE_SUFFIXES.items():
+        if name.endswith(suffix):
+            return archive_type
+    raise ArchiveFormatError(f"압축 형식을 알 수 없습니다: {path} (지원: {', '.join(ARCHIVE_SUFFIXES)})")
+
+
+class ParallelGzipWriter:
+    """
+    쓰여진 데이터를 GZIP_BLOCK_SIZE 블록으로 나눠 스레드 풀에서 각각 독립된 gzip 멤버로 압축하고 순서대로 씁니다. (pigz와 같은 방식)
+    여러 멤버를 이어 붙인 gzip은 표준 도구(gzip -d, tar xzf)로 그대로 풀립니다.
+    압축 대기 중인 블록 수를 workers x 2로 제한하므로 메모리는 블록 크기 x 그 개수를 넘지 않습니다.
+    """
+
+    def __init__(self, out, level: int = DEFAULT_LEVEL, workers: int = DEFAULT_WORKERS, block_size: int = GZIP_BLOCK_SIZE):
+        self._out = out
+        self.level = level
+        self.block_size = block_size
+        self._max_pending = max(1, workers) * 2
+        self._executor = ThreadPoolExecutor(max_workers=max(1, workers))
+        self._pending = deque()
+        self._buffer = bytearray()
+
+    def write(self, data) -> int:
+        self._buffer += data
+        while len(self._buffer) >= self.block_size:
+            self._submit(bytes(self._buffer[:self.block_size]))
+            del self._buffer[:self.block_size]
+        return len(data)
+
+    def _submit(self, block: bytes):
+        if len(self._pending) >= self._max_pending:
+            self._out.write(self._pending.popleft().result())
+        # mtime=0: 같은 입력이면 같은 결과가 나오도록 함
+        self._pending.append(self._executor.submit(gzip.compress, block, self.level, mtime=0))
+
+    def close(self):
+        """남은 데이터를 압축해 모두 씀 (out은 닫지 않음)"""
+        try:
+            if self._buffer:
+                self._submit(bytes(self._buffer))
+                self._buffer.clear()
+            while self._pending:
+                self._out.write(self._pending.popleft().result())
+        finally:
+            self._executor.shutdown(cancel_futures=True)
+
+
+def _zstd_writer(out, workers: int):
+    """zstandard 패키지가 있으면 멀티스레드 zstd 스트림을 반환"""
+    try:
+        import zstandard
+    except ImportError as e:
+        raise ArchiveFormatError("tar.zst 출력에는 zstandard 패키지가 필요합니다. (pip install zstandard)") from e
+    return zstandard.ZstdCompressor(level=ZSTD_LEVEL, threads=max(1, workers)).stream_writer(out, closefd=False)
+
+
+class ArchiveWriter:
+    """
+    계획의 각 파일을 새 파일명으로 압축 파일에 바로 기록합니다. 대상 디렉토리에 복사한 뒤 다시 압축하지 않으므로 한 번만 읽고 씁니다.
+    파일 내용은 CHUNK_SIZE 단위로 흘려보내므로 파일 크기와 관계없이 메모리 사용량이 일정합니다.
+    tar.gz는 블록별 병렬 gzip, tar.zst는 zstd의 멀티스레드 압축을 사용합니다. zip은 표준 zipfile이 멤버를 순서대로 압축합니다.
+    압축 파일은 임시 이름으로 쓰고 끝나면 최종 이름으로 바꾸므로, 중간에 실패해도 쓰다 만 압축 파일이 남지 않습니다.
+    """
+
+    def __init__(self, archive_path: Path, archive_type: str | None = None, workers: int = DEFAULT_WORKERS, level: int = DEFAULT_LEVEL,
+                 on_file_done: Callable[[Path, str, Exception | None], None] | None = None, events: EventBus | None = None,
+                 durability: str = DEFAULT_DURABILITY):
+        self.archive_path = Path(archive_path)
+        self.archive_type = archive_type or archive_format(self.archive_path)
+        if self.archive_type not in ARCHIVE_FORMATS:
+            raise ArchiveFormatError(f"알 수 없는 압축 형식: {self.archive_type}")
+        self.workers = max(1, workers)
+        self.level = level
+        self.on_file_done = on_file_done
+        self.events = events
+        self.durability = durability
+
+    def write_all(self, pairs: Iterable[tuple[Path, str]], cancel_token: CancelToken | None = None) -> CopyResult:
+        """
+        (원본, 새 파일명) 쌍을 순서대로 압축 파일에 추가합니다.
+        열 수 없는 파일은 CopyResult.errors에 모으고 건너뜁니다. 취소되면 그때까지 추가한 파일로 압축 파일을 마무리합니다.
+        """
+        result = CopyResult()
+        self.archive_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = temp_path(self.archive_path)
+        try:
+            with open(tmp, "wb") as out:
+                if self.archive_type == "zip":
+                    self._write_zip(out, pairs, result, cancel_token)
+                else:
+                    self._write_tar(out, pairs, result, cancel_token)
+            commit_file(tmp, self.archive_path, "none" if self.durability == "none" else "strict")
+        except BaseException:
+            tmp.unlink(missing_ok=True)
+            raise
+        return result
+
+    def _write_tar(self, out, pairs, result: CopyResult, cancel_token: CancelToken | None):
+        if self.archive_type == "tar.gz":
+            stream = ParallelGzipWriter(out, self.level, self.workers)
+        elif self.archive_type == "tar.zst":
+            stream = _zstd_writer(out, self.workers)
+        else:
+            stream = None
+        try:
+            # "w|"는 되감기 없이 순서대로만 쓰는 스트림 모드
+            with tarfile.open(fileobj=stream or out, mode="w|", format=tarfile.PAX_FORMAT) as tar:
+                def add(src: Path, new_name: str, fsrc) -> int:
+                    info = tar.gettarinfo(arcname=new_name, fileobj=fsrc)
+                    tar.addfile(info, fsrc)
+                    return info.size
+
+                self._add_members(pairs, result, cancel_token, add)
+        finally:
+            if stream is not None:
+                stream.close()
+
+    def _write_zip(self, out, pairs, result: CopyResult, cancel_token: CancelToken | None):
+        with zipfile.ZipFile(out, "w", zipfile.ZIP_DEFLATED, allowZip64=True, compresslevel=self.level) as archive:
+            def add(src: Path, new_name: str, fsrc) -> int:
+                info = zipfile.ZipInfo.from_file(src, arcname=new_name)
+                info.compress_type = zipfile.ZIP_DEFLATED
+                size = os.fstat(fsrc.fileno()).st_size
+                with archive.open(info, "w", force_zip64=size >= zipfile.ZIP64_LIMIT) as dst:
+                    shutil.copyfileobj(fsrc, dst, CHUNK_SIZE)
+                return size
+
+            self._add_members(pairs, result, cancel_token, add)
+
+    def _add_members(self, pairs, result: CopyResult, cancel_token: CancelToken | None, add: Callable[[Path, str, object], int]):
+        for src, new_name in pairs:
+            if cancel_token is not None and cancel_token.cancelled:
+                result.cancelled = True
+                break
+            if self.events:
+                self.events.emit("copy_started", source=src, target=new_name)
+            started_at = time.perf_counter()
+            try:
+                fsrc = open(src, "rb")
+            except OSError as e:
+                # 아직 아무것도 쓰지 않았으므로 건너뛰어도 압축 파일은 온전함
+                self._record(src, new_name, result, 0, e, started_at)
+                continue
+            # 멤버를 쓰는 도중의 오류는 압축 파일을 망가뜨리므로 전체 작업을 중단
+            with fsrc:
+                try:
+                    size = add(src, new_name, fsrc)
+                except OSError as e:
+                    raise ArchiveMemberError(src, new_name, e) from e
+            self._record(src, new_name, result, size, None, started_at)
+
+    def _record(self, src: Path, new_name: str, result: CopyResult, size: int, error: Exception | None, started_at: float):
+        if self.events:
+            if error is None:
+                self.events.emit("copy_finished", source=src, target=new_name, bytes=size, seconds=time.perf_counter() - started_at,
+                                 mode=self.archive_type)
+            else:
+                self.events.emit("error", source=src, target=new_name, error=error)
+        if error is None:
+            result.copied += 1
+            result.bytes_copied += size
+            result.by_mode[self.archive_type] += 1
+        else:
+            result.errors.append((src, Path(new_name), error))
+        if self.on_file_done:
+            self.on_file_done(src, new_name, error)
@@ -0,0 +1,127 @@
+import queue
+import threading
+import traceback
+from typing import Any, Callable
+
+
+class TaskCancelled(Exception):
+    """작업이 취소되었을 때 작업 스레드 안에서 발생"""
+
+
+class CancelToken:
+    """작업 스레드가 주기적으로 확인하는 취소 신호"""
+
+    def __init__(self):
+        self._event = threading.Event()
+
+    def cancel(self):
+        self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def check(self):
+        """취소되었으면 TaskCancelled 발생"""
+        if self._event.is_set():
+            raise TaskCancelled()
+
+
+class BackgroundTask:
+    """
+    func(token, report)를 작업 스레드에서 실행하고 결과를 Tk 메인루프로 넘겨주는 도우미.
+    report(item)로 보낸 진행 상황은 큐에 쌓였다가 after() 주기마다 on_progress(items)로 한꺼번에 전달됩니다.
+    콜백은 모두 메인루프에서 호출되며, 취소된 작업은 on_done 대신 on_cancelled(부분 결과 또는 None)를 호출합니다.
+    """
+    POLL_MS = 50  # 큐를 확인하는 주기
+
+    def __init__(self, root, func: Callable[[CancelToken, Callable[[Any], None]], Any],
+                 on_done: Callable[[Any], None] | None = None,
+                 on_error: Callable[[BaseException], None] | None = None,
+                 on_progress: Callable[[list], None] | None = None,
+                 on_cancelled: Callable[[Any], None] | None = None):
+        self.root = root  # after()를 제공하는 Tk 위젯
+        self.func = func
+        self.on_done = on_done
+        self.on_error = on_error
+        self.on_progress = on_progress
+        self.on_cancelled = on_cancelled
+        self.token = CancelToken()
+        self._queue: queue.Queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._after_id = None
+
+    def start(self):
+        self._thread.start()
+        self._after_id = self.root.after(self.POLL_MS, self._poll)
+        return self
+
+    def cancel(self):
+        """작업을 취소 (작업 스레드는 다음 확인 지점에서 멈춤)"""
+        self.token.cancel()
+
+    @property
+    def running(self) -> bool:
+        return self._thread.is_alive()
+
+    def _run(self):
+        try:
+            result = self.func(self.token, lambda item: self._queue.put(("progress", item)))
+        except TaskCancelled:
+            self._queue.put(("cancelled", None))
+        except BaseException as e:
+            traceback.print_exc()
+            self._queue.put(("error", e))
+        else:
+            self._queue.put(("done", result))
+
+    def _poll(self):
+        """쌓인 메시지를 한 번에 꺼내 메인루프에서 처리"""
+        self._after_id = None
+        progress = []
+        finished = None
+        while True:
+            try:
+                kind, payload = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if kind == "progress":
+                progress.append(payload)
+            else:
+                finished = (kind, payload)
+
+        if progress and self.on_progress and not self.token.cancelled:
+            self.on_progress(progress)
+
+        if finished is None:
+            self._after_id = self.root.after(self.POLL_MS, self._poll)
+            return
+
+        kind, payload = finished
+        if self.token.cancelled:
+            # 취소된 작업은 끝까지 진행했더라도 on_done으로 넘기지 않음
+            if self.on_cancelled:
+                self.on_cancelled(payload if kind == "done" else None)
+        elif kind == "done" and self.on_done:
+            self.on_done(payload)
+        elif kind == "error" and self.on_error:
+            self.on_error(payload)
+
+
+class Debouncer:
+    """연속된 호출 중 마지막 호출만 delay_ms 뒤에 실행"""
+
+    def __init__(self, root, delay_ms: int, callback: Callable[[], None]):
+        self.root = root
+        self.delay_ms = delay_ms
+        self.callback = callback
+        self._after_id = None
+
+    def trigger(self):
+        if self._after_id is not None:
+            self.root.after_cancel(self._after_id)
+        self._after_id = self.root.after(self.delay_ms, self._fire)
+
+    def _fire(self):
+        self._after_id = None
+        self.callback()
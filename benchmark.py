@@ -0,0 +1,253 @@
+"""
+합성 디렉토리 트리로 스캔/계획/복사 단계를 따로 측정하는 벤치마크
+
+예)
+    python benchmark.py --dirs 50 --files 200 --dup-ratio 0.5 --output bench.json
+    python benchmark.py --dirs 50 --files 200 --compare bench.json
+    python benchmark.py --dirs 50 --files 200 --scale 1 2 4 --modes    # 계획 시간이 파일 수에 비례하는지만 확인
+"""
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import platform
+import subprocess
+import tempfile
+import tracemalloc
+from pathlib import Path
+
+from scan_index import ScanIndex
+from copy_engine import DEFAULT_WORKERS, DURABILITY_MODES, TRANSFER_MODES
+from merge_core import FileNameTemplate, apply_template, merge_files
+
+# 측정할 템플릿 (마지막 두 개는 번호 충돌이 많은 최악의 경우)
+PLAN_TEMPLATES = {
+    "default": "<ORIGINAL>_<NUM>_<DATE>_<TIME>_<RAND>",
+    "original": "<ORIGINAL>",
+    "num_only": "<NUM>",
+    "rand_only": "<RAND>",
+}
+# 규모 확장 측정에 쓰는 템플릿 (모든 파일 이름이 겹치는 트리에서 번호 배정 비용을 봄)
+SCALE_TEMPLATES = {
+    "num_only": "<NUM>",
+    "original_num": "<ORIGINAL>_<NUM>",
+}
+DESTRUCTIVE_MODES = ("move",)  # 원본 트리를 옮겨 버리므로 측정할 때마다 트리를 다시 만들어야 하는 전송 방식
+# 이 값이 같아야 같은 트리를 측정한 결과이므로 --compare가 의미 있음
+TREE_PARAMS = ("dirs", "files", "dup_ratio", "size_dist", "pattern", "seed")
+
+
+def parse_size_dist(spec: str):
+    """
+    파일 크기 분포를 함수로 바꿉니다.
+      fixed:N           - 모두 N 바이트
+      uniform:A,B       - A~B 바이트 균등 분포
+      lognormal:MU,SIGMA - 로그 정규 분포 (사진/문서처럼 작은 파일이 많고 큰 파일이 가끔 있는 경우)
+    """
+    kind, _, params = spec.partition(":")
+    values = [float(v) for v in params.split(",")] if params else []
+    if kind == "fixed":
+        return lambda rng: int(values[0])
+    if kind == "uniform":
+        return lambda rng: rng.randint(int(values[0]), int(values[1]))
+    if kind == "lognormal":
+        return lambda rng: int(rng.lognormvariate(values[0], values[1]))
+    raise ValueError(f"알 수 없는 크기 분포: {spec}")
+
+
+def generate_tree(root: Path, dirs: int, files: int, dup_ratio: float, size_of, seed: int) -> list[Path]:
+    """
+    dirs개 디렉토리에 각각 files개 파일을 만듭니다.
+    dup_ratio 비율의 파일은 모든 디렉토리에서 같은 이름(IMG_0001.jpg 등)을 쓰고 나머지는 고유한 이름을 씁니다.
+    """
+    rng = random.Random(seed)
+    payload = os.urandom(1024 * 1024)
+    shared = int(files * dup_ratio)
+    directories = []
+    for d in range(dirs):
+        directory = root / f"src_{d:04d}"
+        directory.mkdir(parents=True)
+        directories.append(directory)
+        for f in range(files):
+            name = f"IMG_{f:04d}.jpg" if f < shared else f"D{d:04d}_{f:05d}.jpg"
+            size = size_of(rng)
+            with open(directory / name, "wb") as out:
+                while size > 0:
+                    chunk = payload[:min(size, len(payload))]
+                    out.write(chunk)
+                    size -= len(chunk)
+    return directories
+
+
+def timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    value = func(*args, **kwargs)
+    return time.perf_counter() - start, value
+
+
+def git_revision() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=Path(__file__).parent,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmarks(args, work_dir: Path) -> dict:
+    results = {}
+
+    def record(name: str, seconds: float, files: int, bytes_: int | None = None):
+        entry = {"seconds": round(seconds, 6), "files": files, "files_per_s": round(files / seconds, 1) if seconds else None}
+        if bytes_ is not None:
+            entry["mb_per_s"] = round(bytes_ / 1024 / 1024 / seconds, 2) if seconds else None
+        results[name] = entry
+        print(f"{name:24s} {seconds:10.4f}s  {entry['files_per_s']} files/s", file=sys.stderr)
+
+    def make_tree() -> list[Path]:
+        return generate_tree(work_dir / "src", args.dirs, args.files, args.dup_ratio, parse_size_dist(args.size_dist), args.seed)
+
+    seconds, directories = timed(make_tree)
+    total_files = args.dirs * args.files
+    print(f"트리 생성 {seconds:.2f}s ({total_files}개 파일)", file=sys.stderr)
+
+    # 1. 스캔 (캐시 없음 / 캐시 재사용)
+    index = ScanIndex()
+    seconds, _ = timed(lambda: [index.match_files(d, args.pattern) for d in directories])
+    record("scan_cold", seconds, total_files)
+    seconds, _ = timed(lambda: [index.match_files(d, args.pattern) for d in directories])
+    record("scan_cached", seconds, total_files)
+
+    # 2. 템플릿 렌더링만
+    template = FileNameTemplate(PLAN_TEMPLATES["default"], "IMG_0001.jpg")
+    seconds, _ = timed(lambda: [template.generate(i) for i in range(total_files)])
+    record("template_generate", seconds, total_files)
+
+    # 3. 계획 (스캔은 캐시된 상태로 계획 시간만 측정)
+    for name, plan_template in PLAN_TEMPLATES.items():
+        for duplicates_only in (False, True):
+            label = f"plan_{name}" + ("_dup_only" if duplicates_only else "")
+            seconds, plan = timed(apply_template, directories, plan_template, not duplicates_only, args.pattern, index)
+            record(label, seconds, len(plan))
+
+    # 계획이 차지하는 메모리 (스캔 캐시는 이미 채워져 있으므로 계획 자체만 측정)
+    tracemalloc.start()
+    plan = apply_template(directories, PLAN_TEMPLATES["default"], True, args.pattern, index)
+    plan_bytes, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    results["plan_memory"] = {"bytes": plan_bytes, "bytes_per_file": round(plan_bytes / len(plan), 1) if len(plan) else None}
+    print(f"{'plan_memory':24s} {plan_bytes / 1024 / 1024:10.2f}MB", file=sys.stderr)
+    del plan
+
+    # 4. 규모 확장: 디렉토리 수를 scale배로 늘린, 모든 이름이 겹치는(dup-ratio 1.0) 빈 파일 트리에서 계획 시간을 측정
+    #    파일당 시간이 가장 작은 트리와 비슷하면(per_file_ratio가 1에 가까우면) 계획 시간이 파일 수에 비례함
+    scale_seconds = {}
+    for scale in args.scale:
+        scale_dirs = generate_tree(work_dir / f"scale_{scale}", args.dirs * scale, args.files, 1.0, lambda rng: 0, args.seed)
+        scale_index = ScanIndex()
+        for directory in scale_dirs:
+            scale_index.match_files(directory, args.pattern)
+        for name, plan_template in SCALE_TEMPLATES.items():
+            seconds, plan = timed(apply_template, scale_dirs, plan_template, True, args.pattern, scale_index)
+            record(f"scale_{name}_x{scale}", seconds, len(plan))
+            scale_seconds[name, scale] = (seconds, len(plan))
+            del plan
+        shutil.rmtree(work_dir / f"scale_{scale}")
+    if len(args.scale) > 1:
+        smallest = min(args.scale)
+        for name in SCALE_TEMPLATES:
+            base_seconds, base_files = scale_seconds[name, smallest]
+            for scale in args.scale:
+                seconds, files = scale_seconds[name, scale]
+                ratio = round((seconds / files) / (base_seconds / base_files), 2) if base_seconds and files else None
+                results[f"scale_{name}_x{scale}"]["per_file_ratio"] = ratio
+                print(f"{f'scale_{name}_x{scale}':24s} 파일당 시간 x{ratio} (x{smallest} 대비)", file=sys.stderr)
+
+    # 5. 복사 (전송 방식 x 내구성별, fsync 비용을 비교할 수 있도록)
+    total_bytes = sum(f.stat().st_size for d in directories for f in d.iterdir())
+    for mode in args.modes:
+        for durability in args.durability:
+            target = work_dir / f"out_{mode}_{durability}"
+            seconds, result = timed(merge_files, directories, target, PLAN_TEMPLATES["original"], True, args.pattern,
+                                    workers=args.workers, mode=mode, durability=durability)
+            # 기존 결과와 비교할 수 있도록 fsync 없는 경우는 예전 이름을 그대로 사용
+            record(f"copy_{mode}" if durability == "none" else f"copy_{mode}_{durability}", seconds, result.copied, total_bytes)
+            shutil.rmtree(target)
+            if mode in DESTRUCTIVE_MODES:
+                # 같은 시드로 원본 트리를 다시 만들어 다음 측정도 같은 파일을 옮기거나 복사하도록 함
+                shutil.rmtree(work_dir / "src")
+                make_tree()
+
+    return results
+
+
+def compare(current: dict, params: dict, baseline_path: Path) -> bool:
+    """
+    이전 결과 파일과 비교해 단계별 처리량(files/s) 변화율을 출력합니다.
+    :return: 트리 매개변수가 달라 비교할 수 없으면 False
+    """
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline_report = json.load(f)
+    baseline = baseline_report["results"]
+    baseline_params = baseline_report.get("params", {})
+    different = [key for key in TREE_PARAMS if baseline_params.get(key) != params.get(key)]
+    if different:
+        details = ", ".join(f"{key}: {baseline_params.get(key)} -> {params.get(key)}" for key in different)
+        print(f"\n비교할 수 없습니다: 합성 트리 매개변수가 다릅니다 ({details})", file=sys.stderr)
+        return False
+
+    print(f"\n{'benchmark (files/s)':24s} {'baseline':>10s} {'current':>10s} {'change':>8s}", file=sys.stderr)
+    for name, entry in current.items():
+        before, after = baseline.get(name, {}).get("files_per_s"), entry.get("files_per_s")
+        if not before or after is None:
+            continue
+        change = (after - before) / before * 100
+        print(f"{name:24s} {before:10.1f} {after:10.1f} {change:+7.1f}%", file=sys.stderr)
+    return True
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="mergefile 스캔/계획/복사 벤치마크")
+    parser.add_argument("--dirs", type=int, default=20, help="소스 디렉토리 수")
+    parser.add_argument("--files", type=int, default=500, help="디렉토리당 파일 수")
+    parser.add_argument("--dup-ratio", type=float, default=0.5, help="모든 디렉토리에서 이름이 겹치는 파일 비율 (0~1)")
+    parser.add_argument("--size-dist", default="lognormal:8,1.5", help="파일 크기 분포 (fixed:N, uniform:A,B, lognormal:MU,SIGMA)")
+    parser.add_argument("--pattern", default="*.*", help="파일 선택 와일드카드 패턴")
+    parser.add_argument("--modes", nargs="*", choices=TRANSFER_MODES, default=["copy"],
+                        help="측정할 전송 방식 (move는 측정할 때마다 원본 트리를 다시 만듦, 값 없이 주면 복사를 측정하지 않음)")
+    parser.add_argument("--scale", nargs="*", type=int, default=[1, 2, 4],
+                        help="규모 확장 측정에서 디렉토리 수에 곱할 배수 (값 없이 주면 측정하지 않음)")
+    parser.add_argument("--durability", nargs="+", choices=DURABILITY_MODES, default=list(DURABILITY_MODES), help="측정할 내구성 수준")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="동시 복사 개수")
+    parser.add_argument("--seed", type=int, default=0, help="난수 시드 (같은 값이면 같은 트리)")
+    parser.add_argument("--work-dir", type=Path, help="합성 트리를 만들 디렉토리 (기본값: 임시 디렉토리)")
+    parser.add_argument("--output", type=Path, help="결과 JSON 저장 경로 (기본값: 표준 출력)")
+    parser.add_argument("--compare", type=Path, help="비교할 이전 결과 JSON")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory(dir=args.work_dir) as tmp:
+        results = run_benchmarks(args, Path(tmp))
+
+    report = {
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "params": {key: (str(value) if isinstance(value, Path) else value) for key, value in vars(args).items()},
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+    else:
+        json.dump(report, sys.stdout, indent=2, ensure_ascii=False)
+        sys.stdout.write("\n")
+
+    if args.compare and not compare(results, report["params"], args.compare):
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
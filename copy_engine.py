@@ -0,0 +1,380 @@
+import os
+import sys
+import errno
+import time
+import shutil
+import hashlib
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from pathlib import Path
+from typing import Callable, Iterable
+from background_task import CancelToken
+from merge_events import EventBus
+
+DEFAULT_WORKERS = 4  # 기본 동시 복사 개수
+CHUNK_SIZE = 8 * 1024 * 1024  # 커널 복사 한 번에 넘기는 최대 바이트 수
+
+# 전송 방식
+#   auto    - 원본과 대상이 같은 파일 시스템이면 reflink, 아니면 copy (원본과 독립적인 사본만 만듦)
+#   copy    - 내용 복사
+#   hardlink - 하드 링크 (같은 파일 시스템에서만 가능, 아니면 copy)
+#   reflink - 블록을 공유하는 복제 (btrfs/XFS 등, 지원하지 않으면 copy)
+#   move    - 원본을 대상으로 이동 (같은 파일 시스템이면 이름만 바꿈)
+#   pipelined - 큰 버퍼로 읽기/쓰기를 겹쳐 수행하는 내용 복사 (SMB/NFS처럼 지연이 큰 대상용, pipelined_copy 참고)
+TRANSFER_MODES = ("auto", "copy", "hardlink", "reflink", "move", "pipelined")
+DEFAULT_MODE = "auto"
+
+# 내구성 (전원이 꺼져도 대상 파일을 믿을 수 있는 정도)
+#   none    - fsync 하지 않음 (가장 빠름, 운영체제가 나중에 기록)
+#   batched - SYNC_BATCH_FILES개 또는 SYNC_BATCH_BYTES마다 모아서 임시 파일을 fsync하고 최종 이름으로 바꾼 뒤 대상 디렉토리를 fsync
+#   strict  - 파일마다 내용과 디렉토리를 fsync (가장 느림)
+# 어느 경우든 임시 이름에 쓴 뒤 최종 이름으로 원자적으로 바꾸므로, 실행 중 오류나 프로세스 종료로 최종 이름에 쓰다 만 파일이 남지 않음
+# 전원이 꺼져도 최종 이름의 파일이 온전하다는 보장은 batched와 strict에서만 성립 (none은 내용이 기록되기 전에 이름만 바뀌어 있을 수 있음)
+DURABILITY_MODES = ("none", "batched", "strict")
+DEFAULT_DURABILITY = "none"
+SYNC_BATCH_FILES = 256
+SYNC_BATCH_BYTES = 256 * 1024 * 1024
+TEMP_SUFFIX = ".mergefile-tmp"
+NAME_MAX = 255  # 대부분의 파일 시스템에서 파일 이름 한 단계의 최대 바이트 수
+
+FICLONE = 0x40049409  # linux/fs.h의 ioctl 번호
+
+# 이 오류들은 커널 복사 경로를 지원하지 않는다는 뜻이므로 다음 방법으로 넘어감
+_FALLBACK_ERRNOS = {errno.ENOSYS, errno.EXDEV, errno.EINVAL, errno.EOPNOTSUPP, errno.ENOTSUP, errno.EBADF, errno.ENOTTY, errno.EPERM}
+
+
+def _copy_file_range(fsrc, fdst) -> bool:
+    """os.copy_file_range로 복사. 처음부터 지원되지 않으면 False 반환"""
+    if not hasattr(os, "copy_file_range"):
+        return False
+    infd, outfd = fsrc.fileno(), fdst.fileno()
+    offset = 0
+    while True:
+        try:
+            sent = os.copy_file_range(infd, outfd, CHUNK_SIZE)
+        except OSError as e:
+            if offset == 0 and e.errno in _FALLBACK_ERRNOS:
+                return False
+            raise
+        if sent == 0:
+            # 일부 파일 시스템(procfs, FUSE 등)은 내용이 있어도 처음부터 0을 돌려주므로 다음 방법으로 넘어감
+            return offset > 0 or not _has_content(infd)
+        offset += sent
+
+
+def _has_content(fd: int) -> bool:
+    return os.fstat(fd).st_size > 0
+
+
+def _sendfile(fsrc, fdst) -> bool:
+    """os.sendfile로 복사. 처음부터 지원되지 않으면 False 반환"""
+    if not hasattr(os, "sendfile"):
+        return False
+    infd, outfd = fsrc.fileno(), fdst.fileno()
+    offset = 0
+    while True:
+        try:
+            sent = os.sendfile(outfd, infd, offset, CHUNK_SIZE)
+        except OSError as e:
+            if offset == 0 and e.errno in _FALLBACK_ERRNOS:
+                return False
+            raise
+        if sent == 0:
+            return offset > 0 or not _has_content(infd)
+        offset += sent
+
+
+def copy_file(src: Path, dst: Path) -> int:
+    """
+    shutil.copy와 같이 내용과 권한을 복사하되, 가능하면 커널 내부 복사 경로를 사용합니다.
+    :return: 복사한 바이트 수
+    """
+    with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+        if not _copy_file_range(fsrc, fdst) and not _sendfile(fsrc, fdst):
+            shutil.copyfileobj(fsrc, fdst, CHUNK_SIZE)
+        fdst.flush()
+        size = os.fstat(fdst.fileno()).st_size
+    shutil.copymode(src, dst)
+    return size
+
+
+def reflink_file(src: Path, dst: Path) -> bool:
+    """FICLONE으로 블록을 공유하는 복제본을 만듭니다. 지원하지 않으면 False 반환"""
+    if not sys.platform.startswith("linux"):
+        return False
+    import fcntl
+    with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+        try:
+            fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+        except OSError as e:
+            if e.errno in _FALLBACK_ERRNOS:
+                return False
+            raise
+    shutil.copymode(src, dst)
+    return True
+
+
+def hardlink_file(src: Path, dst: Path) -> bool:
+    """하드 링크를 만듭니다. (대상이 있으면 덮어씀) 다른 파일 시스템이라 불가능하면 False 반환"""
+    try:
+        os.link(src, dst)
+    except FileExistsError:
+        os.unlink(dst)
+        os.link(src, dst)
+    except OSError as e:
+        if e.errno in _FALLBACK_ERRNOS:
+            return False
+        raise
+    return True
+
+
+def transfer_file(src: Path, dst: Path, mode: str = DEFAULT_MODE, target_dev: int | None = None) -> tuple[int, str]:
+    """
+    mode에 맞춰 파일 하나를 대상으로 옮깁니다. 선택한 방식이 불가능하면 copy로 대체합니다.
+    :param target_dev: 대상 디렉토리의 st_dev (auto에서 같은 파일 시스템인지 비교)
+    :return: (파일 크기, 실제로 사용한 방식)
+    """
+    stat = os.stat(src)
+    if mode == "auto":
+        same_device = target_dev is not None and stat.st_dev == target_dev
+        mode = "reflink" if same_device else "copy"
+
+    if mode == "reflink" and reflink_file(src, dst):
+        return stat.st_size, "reflink"
+    if mode == "hardlink" and hardlink_file(src, dst):
+        return stat.st_size, "hardlink"
+    if mode == "move":
+        # 같은 파일 시스템이면 os.replace가 이름만 바꾸고, 아니면 shutil.move가 복사 후 삭제
+        shutil.move(src, dst)
+        return stat.st_size, "move"
+    return copy_file(src, dst), "copy"
+
+
+def temp_path(dst: Path) -> Path:
+    """
+    복사 중에 쓰는 임시 파일 경로 (숨김 파일이라 와일드카드 패턴에 걸리지 않음)
+    접두사/접미사를 붙여 NAME_MAX를 넘으면 이름 앞부분만 남기고 원래 이름의 해시를 붙여 서로 겹치지 않게 줄입니다.
+    """
+    name = f".{dst.name}{TEMP_SUFFIX}"
+    if len(os.fsencode(name)) <= NAME_MAX:
+        return dst.with_name(name)
+    digest = hashlib.sha1(os.fsencode(dst.name)).hexdigest()[:8]
+    budget = NAME_MAX - len(f".~{digest}{TEMP_SUFFIX}")
+    base = dst.name
+    # 여러 바이트 문자가 중간에 잘리지 않도록 문자 단위로 줄임
+    while len(os.fsencode(base)) > budget:
+        base = base[:-1]
+    return dst.with_name(f".{base}~{digest}{TEMP_SUFFIX}")
+
+
+def fsync_path(path: Path):
+    """이미 닫힌 파일의 내용을 디스크에 기록"""
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def fsync_directory(directory: Path):
+    """디렉토리 항목(새 이름, 이름 변경)을 디스크에 기록. Windows는 디렉토리를 열 수 없으므로 건너뜀"""
+    if os.name == "nt":
+        return
+    fsync_path(directory)
+
+
+def commit_file(tmp: Path, dst: Path, durability: str = DEFAULT_DURABILITY):
+    """
+    임시 파일을 최종 이름으로 원자적으로 바꿉니다. strict이면 바꾸기 전에 내용을, 바꾼 뒤에 디렉토리를 fsync
+    batched로 복사한 파일은 CopyEngine이 묶음 단위로 fsync한 뒤 바꾸므로 여기로 넘기지 않습니다.
+    """
+    if durability == "strict":
+        fsync_path(tmp)
+    os.replace(tmp, dst)
+    if durability == "strict":
+        fsync_directory(dst.parent)
+
+
+def discard_temp(src: Path, tmp: Path):
+    """실패한 복사의 임시 파일 삭제 (move로 원본이 이미 옮겨졌다면 데이터를 잃지 않도록 남겨 둠)"""
+    if os.path.lexists(src):
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+
+
+class CopyResult:
+    """복사 결과 (성공 개수, 바이트 수, 파일별 오류 목록)"""
+
+    def __init__(self):
+        self.copied = 0
+        self.bytes_copied = 0
+        self.errors: list[tuple[Path, Path, Exception]] = []
+        self.cancelled = False
+        self.by_mode: dict[str, int] = defaultdict(int)  # 실제로 사용한 전송 방식별 파일 수
+        self.verification = None  # 복사 후 검증 결과 (merge_verify.VerifyResult, 검증하지 않았으면 None)
+
+    @property
+    def failed(self) -> int:
+        return len(self.errors)
+
+
+class CopyEngine:
+    """
+    스레드 풀로 여러 파일을 동시에 복사하는 엔진. mode로 전송 방식(TRANSFER_MODES)을 고릅니다.
+    한 파일이 실패해도 멈추지 않고 오류를 CopyResult.errors에 모읍니다.
+    on_file_done(src, dst, error)는 작업 스레드에서 호출되므로 GUI에서는 after()로 넘겨야 합니다.
+    """
+
+    def __init__(self, workers: int = DEFAULT_WORKERS, on_file_done: Callable[[Path, Path, Exception | None], None] | None = None,
+                 mode: str = DEFAULT_MODE, events: EventBus | None = None, durability: str = DEFAULT_DURABILITY):
+        if mode not in TRANSFER_MODES:
+            raise ValueError(f"알 수 없는 전송 방식: {mode}")
+        if durability not in DURABILITY_MODES:
+            raise ValueError(f"알 수 없는 내구성 수준: {durability}")
+        self.workers = max(1, workers)
+        self.on_file_done = on_file_done
+        self.mode = mode
+        self.events = events  # copy_started/copy_finished/error 이벤트
+        self.durability = durability
+        self._lock = threading.Lock()
+        self._target_devs: dict[Path, int | None] = {}  # 대상 디렉토리 -> st_dev
+        self._sync_lock = threading.Lock()
+        self._unsynced: list[tuple[Path, Path, int, str, float]] = []  # batched: 아직 fsync하지 않은 (원본, 대상, 크기, 방식, 시작 시각)
+        self._unsynced_bytes = 0
+
+    def _target_dev(self, directory: Path) -> int | None:
+        if directory not in self._target_devs:
+            try:
+                self._target_devs[directory] = os.stat(directory).st_dev
+            except OSError:
+                self._target_devs[directory] = None
+        return self._target_devs[directory]
+
+    def _copy_one(self, src: Path, dst: Path, result: CopyResult, cancel_token: CancelToken | None):
+        if cancel_token is not None and cancel_token.cancelled:
+            result.cancelled = True
+            return  # 대기 중에 취소된 파일은 시작하지 않음
+        if self.events:
+            self.events.emit("copy_started", source=src, target=dst)
+        started_at = time.perf_counter()
+        size, used_mode, error = 0, self.mode, None
+        tmp = temp_path(dst)
+        try:
+            size, used_mode = transfer_file(src, tmp, self.mode, self._target_dev(dst.parent))
+            if self.durability != "batched":
+                commit_file(tmp, dst, self.durability)
+        except Exception as e:
+            error = e
+            discard_temp(src, tmp)
+        self._complete(src, dst, result, size, used_mode, error, started_at)
+
+    def _complete(self, src: Path, dst: Path, result: CopyResult, size: int, used_mode: str, error: Exception | None, started_at: float):
+        """
+        파일 하나의 전송이 끝난 뒤 호출. batched이면 파일은 아직 임시 이름(temp_path(dst))에 있고,
+        묶음을 fsync해 최종 이름으로 바꿀 때까지 완료 처리를 미루므로 on_file_done(저널 기록 등)은
+        파일이 디스크에 기록된 뒤에만 호출됩니다.
+        """
+        if error is not None or self.durability != "batched":
+            self._record(src, dst, result, size, used_mode, error, started_at)
+            return
+        with self._sync_lock:
+            self._unsynced.append((src, dst, size, used_mode, started_at))
+            self._unsynced_bytes += size
+            if len(self._unsynced) < SYNC_BATCH_FILES and self._unsynced_bytes < SYNC_BATCH_BYTES:
+                return
+            batch = self._take_unsynced()
+        self._sync_batch(batch, result)
+
+    def _take_unsynced(self) -> list[tuple[Path, Path, int, str, float]]:
+        batch = self._unsynced
+        self._unsynced = []
+        self._unsynced_bytes = 0
+        return batch
+
+    def _sync_batch(self, batch: list[tuple[Path, Path, int, str, float]], result: CopyResult):
+        """
+        모아 둔 임시 파일을 fsync하고 최종 이름으로 바꾼 뒤 디렉토리를 fsync하고 완료 처리.
+        최종 이름으로 바꾸기 전에 내용이 디스크에 있으므로 전원이 꺼져도 최종 이름에 비거나 쓰다 만 파일이 남지 않습니다.
+        """
+        errors = {}
+        for src, dst, _, _, _ in batch:
+            tmp = temp_path(dst)
+            try:
+                fsync_path(tmp)
+            except OSError as e:
+                errors[dst] = e
+                discard_temp(src, tmp)
+        for src, dst, _, _, _ in batch:
+            if dst in errors:
+                continue
+            tmp = temp_path(dst)
+            try:
+                os.replace(tmp, dst)
+            except OSError as e:
+                errors[dst] = e
+                discard_temp(src, tmp)
+        for directory in {dst.parent for _, dst, _, _, _ in batch if dst not in errors}:
+            try:
+                fsync_directory(directory)
+            except OSError as e:
+                for _, dst, _, _, _ in batch:
+                    if dst.parent == directory:
+                        errors.setdefault(dst, e)
+        for src, dst, size, used_mode, started_at in batch:
+            self._record(src, dst, result, size, used_mode, errors.get(dst), started_at)
+
+    def flush(self, result: CopyResult):
+        """batched에서 아직 fsync하지 않은 파일을 모두 fsync해 최종 이름으로 바꿈 (copy_all이 끝날 때 호출)"""
+        with self._sync_lock:
+            batch = self._take_unsynced()
+        if batch:
+            self._sync_batch(batch, result)
+
+    def _record(self, src: Path, dst: Path, result: CopyResult, size: int, used_mode: str, error: Exception | None, started_at: float):
+        """파일 하나의 결과를 CopyResult에 반영하고 이벤트/콜백을 보냄"""
+        if self.events:
+            if error is None:
+                self.events.emit("copy_finished", source=src, target=dst, bytes=size, seconds=time.perf_counter() - started_at, mode=used_mode)
+            else:
+                self.events.emit("error", source=src, target=dst, error=error)
+        with self._lock:
+            # 콜백은 잠금 안에서 호출해 한 번에 하나씩만 실행되도록 함
+            # 콜백(저널 기록, 검증 등)이 실패한 파일은 복사되었더라도 실패로 보고
+            if self.on_file_done:
+                try:
+                    self.on_file_done(src, dst, error)
+                except Exception as e:
+                    error = error or e
+            if error is None:
+                result.copied += 1
+                result.bytes_copied += size
+                result.by_mode[used_mode] += 1
+            else:
+                result.errors.append((src, dst, error))
+
+    def copy_all(self, pairs: Iterable[tuple[Path, Path]], cancel_token: CancelToken | None = None) -> CopyResult:
+        """
+        (원본, 대상) 쌍을 모두 복사. 대기 중인 작업 수를 제한해 계획이 커도 메모리가 일정함
+        cancel_token이 취소되면 새 파일은 시작하지 않고, 진행 중인 파일만 마친 뒤 result.cancelled를 설정합니다.
+        """
+        result = CopyResult()
+        max_pending = self.workers * 4
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            pending = set()
+            for src, dst in pairs:
+                if cancel_token is not None and cancel_token.cancelled:
+                    result.cancelled = True
+                    break
+                if len(pending) >= max_pending:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        future.result()  # 작업 스레드에서 발생한 예외(fsync 묶음 처리 등)를 삼키지 않고 다시 발생시킴
+                pending.add(executor.submit(self._copy_one, src, dst, result, cancel_token))
+            done, _ = wait(pending)
+            for future in done:
+                future.result()
+        self.flush(result)
+        return result
@@ -0,0 +1,263 @@
+import os
+import hashlib
+import sqlite3
+import threading
+import multiprocessing
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from pathlib import Path
+from typing import Iterable
+
+from background_task import CancelToken
+
+BLOCK_SIZE = 64 * 1024  # 앞/뒤 블록 해시에 쓰는 크기
+READ_SIZE = 1024 * 1024  # 전체 해시를 계산할 때 한 번에 읽는 크기
+HASH_BATCH_FILES = 32  # 작은 파일은 이 개수만큼 모아서 프로세스 풀에 한 번에 넘김
+HASH_BATCH_BYTES = 64 * 1024 * 1024  # 모은 파일의 크기가 이만큼 되면 바로 넘김
+CANCEL_POLL_SECONDS = 0.2  # 해시를 기다리는 동안 취소를 확인하는 주기
+DEFAULT_CACHE_PATH = Path.home() / ".cache" / "mergefile" / "hashes.sqlite"
+
+
+def hash_edges(path: Path, size: int) -> str:
+    """파일의 앞/뒤 블록만 읽어 만든 빠른 해시 (같은 크기끼리 빠르게 걸러내기용)"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        digest.update(f.read(BLOCK_SIZE))
+        if size > BLOCK_SIZE:
+            f.seek(max(BLOCK_SIZE, size - BLOCK_SIZE))
+            digest.update(f.read(BLOCK_SIZE))
+    return digest.hexdigest()
+
+
+def hash_file(path: Path) -> str:
+    """파일 전체의 sha256 해시 (프로세스 풀에서 호출되므로 모듈 최상위 함수여야 함)"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(READ_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def hash_files(paths: list[Path]) -> list[str | OSError]:
+    """여러 파일의 전체 해시 (프로세스 풀에서 호출되므로 모듈 최상위 함수여야 함). 읽지 못한 파일은 예외를 그대로 돌려줌"""
+    results = []
+    for path in paths:
+        try:
+            results.append(hash_file(path))
+        except OSError as e:
+            results.append(e)
+    return results
+
+
+class HashCache:
+    """
+    (경로, 크기, mtime)을 키로 전체 해시를 저장하는 SQLite 캐시.
+    파일이 바뀌지 않았다면 다시 실행할 때 해시를 다시 계산하지 않습니다.
+    경로는 os.fsencode한 바이트로 저장하므로 UTF-8로 디코딩할 수 없는 파일명도 저장할 수 있습니다.
+    """
+
+    def __init__(self, path: Path = DEFAULT_CACHE_PATH):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS hashes (path BLOB PRIMARY KEY, size INTEGER, mtime_ns INTEGER, sha256 TEXT)"
+        )
+
+    def get(self, path: Path, size: int, mtime_ns: int) -> str | None:
+        with self._lock:
+            row = self._conn.execute("SELECT size, mtime_ns, sha256 FROM hashes WHERE path = ?", (os.fsencode(path),)).fetchone()
+        if row is not None and row[0] == size and row[1] == mtime_ns:
+            return row[2]
+        return None
+
+    def put_many(self, rows: Iterable[tuple[Path, int, int, str]]):
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO hashes (path, size, mtime_ns, sha256) VALUES (?, ?, ?, ?)",
+                [(os.fsencode(path), size, mtime_ns, sha256) for path, size, mtime_ns, sha256 in rows],
+            )
+
+    def close(self):
+        self._conn.close()
+
+
+class HashJob:
+    """파일 하나의 해시 요청. 캐시에 있으면 바로 값을 갖고, 아니면 프로세스 풀 작업의 몇 번째 결과인지 기억함"""
+    __slots__ = ("path", "size", "mtime_ns", "sha256", "error", "future", "position", "hashed")
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.size = self.mtime_ns = 0
+        self.sha256: str | None = None
+        self.error: Exception | None = None
+        self.future = None
+        self.position = 0
+        self.hashed = False  # 새로 계산했으면 True (캐시에 저장할 대상)
+
+    def collect(self):
+        """프로세스 풀 작업이 끝났으면 결과를 가져옴 (끝나지 않았거나 취소되었으면 sha256과 error가 모두 None으로 남음)"""
+        if self.future is None or not self.future.done() or self.future.cancelled():
+            return
+        value = self.future.result()[self.position]
+        self.future = None
+        if isinstance(value, Exception):
+            self.error = value
+        else:
+            self.sha256 = value
+            self.hashed = True
+
+
+class FileHasher:
+    """
+    파일 해시를 HashCache에서 찾거나 프로세스 풀에 모아서 넘깁니다. (중복 검사와 복사 검증이 함께 사용)
+    작은 파일은 HASH_BATCH_FILES개씩 묶어 한 번에 넘기므로 파일마다 프로세스 간 통신을 하지 않습니다.
+    프로세스 풀은 복사 작업 스레드 안에서 처음 만들어질 수 있으므로 fork 대신 spawn으로 시작합니다.
+    (fork는 다른 스레드가 잡고 있던 잠금까지 복사해 자식 프로세스가 멈출 수 있음)
+    """
+
+    def __init__(self, cache: HashCache | None = None, processes: int | None = None):
+        self.cache = cache
+        self.processes = processes
+        self._executor: ProcessPoolExecutor | None = None
+        self._batch: list[HashJob] = []
+        self._batch_bytes = 0
+        self._jobs: list[HashJob] = []
+
+    def request(self, path: Path, use_cache: bool = True) -> HashJob:
+        """
+        해시 계산을 요청합니다. 결과는 wait_all() 뒤에 job.sha256/job.error로 확인
+        :param use_cache: False이면 캐시를 무시하고 다시 읽음 (방금 쓴 대상 파일 등, 결과는 캐시에 저장됨)
+        """
+        job = HashJob(path)
+        try:
+            stat = os.stat(path)
+        except OSError as e:
+            job.error = e
+            return job
+        job.size, job.mtime_ns = stat.st_size, stat.st_mtime_ns
+        if use_cache and self.cache is not None:
+            job.sha256 = self.cache.get(path, job.size, job.mtime_ns)
+            if job.sha256 is not None:
+                return job
+        self._batch.append(job)
+        self._batch_bytes += job.size
+        if len(self._batch) >= HASH_BATCH_FILES or self._batch_bytes >= HASH_BATCH_BYTES:
+            self.flush()
+        return job
+
+    def flush(self):
+        """모아 둔 요청을 프로세스 풀에 넘김"""
+        if not self._batch:
+            return
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.processes, mp_context=multiprocessing.get_context("spawn"))
+        future = self._executor.submit(hash_files, [job.path for job in self._batch])
+        for position, job in enumerate(self._batch):
+            job.future = future
+            job.position = position
+        self._jobs.extend(self._batch)
+        self._batch = []
+        self._batch_bytes = 0
+
+    def wait_all(self, cancel_token: CancelToken | None = None) -> bool:
+        """
+        넘긴 작업을 모두 기다리고 새로 계산한 해시를 캐시에 저장합니다. (취소되어도 이미 계산한 해시는 저장)
+        :return: 취소되었으면 False (시작하지 않은 작업은 버림)
+        """
+        self.flush()
+        completed = True
+        try:
+            pending = {job.future for job in self._jobs if job.future is not None}
+            while pending:
+                # 취소를 주기적으로 확인하고, 취소되면 시작하지 않은 작업은 버림 (finally의 shutdown)
+                _, pending = wait(pending, timeout=CANCEL_POLL_SECONDS, return_when=FIRST_COMPLETED)
+                if cancel_token is not None and cancel_token.cancelled:
+                    completed = False
+                    break
+            for job in self._jobs:
+                job.collect()
+        finally:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+            if self.cache is not None:
+                rows = [(job.path, job.size, job.mtime_ns, job.sha256) for job in self._jobs if job.hashed]
+                if rows:
+                    self.cache.put_many(rows)
+            self._jobs = []
+        return completed
+
+
+class DedupResult:
+    """내용이 같은 파일 중 복사할 파일과 건너뛸 파일 (건너뛴 파일 -> 대신 복사되는 파일)"""
+
+    def __init__(self):
+        self.skipped: dict[Path, Path] = {}
+        self.bytes_saved = 0
+
+    def write_report(self, out):
+        """건너뛴 파일 목록을 '건너뜀<TAB>동일한 원본' 형식으로 기록"""
+        for skipped, kept in self.skipped.items():
+            out.write(f"{skipped}\t{kept}\n")
+
+
+def find_duplicate_content(files: Iterable[Path], cache: HashCache | None = None, processes: int | None = None,
+                           cancel_token: CancelToken | None = None) -> DedupResult:
+    """
+    내용이 같은 파일을 찾습니다. 크기 -> 앞/뒤 블록 해시 -> 전체 해시 순으로 후보를 줄이며,
+    전체 해시는 프로세스 풀에서 계산합니다. 먼저 나온 파일을 남기고 나머지는 건너뛸 파일로 표시합니다.
+    """
+    result = DedupResult()
+
+    # 1. 크기로 묶기 (stat만 필요)
+    by_size: dict[int, list[tuple[Path, int]]] = defaultdict(list)
+    for file in files:
+        try:
+            stat = os.stat(file)
+        except OSError:
+            continue
+        by_size[stat.st_size].append((file, stat.st_mtime_ns))
+
+    # 2. 크기가 같은 파일끼리 앞/뒤 블록 해시로 다시 묶기
+    candidates: list[list[tuple[Path, int, int]]] = []
+    for size, group in by_size.items():
+        if len(group) < 2:
+            continue
+        if cancel_token is not None:
+            cancel_token.check()
+        if size == 0:
+            candidates.append([(file, size, mtime_ns) for file, mtime_ns in group])
+            continue
+        by_edges = defaultdict(list)
+        for file, mtime_ns in group:
+            try:
+                by_edges[hash_edges(file, size)].append((file, size, mtime_ns))
+            except OSError:
+                continue
+        candidates.extend(edge_group for edge_group in by_edges.values() if len(edge_group) > 1)
+
+    # 3. 남은 후보만 전체 해시 계산 (캐시에 있으면 재사용)
+    if cancel_token is not None:
+        cancel_token.check()
+    hasher = FileHasher(cache, processes)
+    jobs = [hasher.request(file) for group in candidates for file, _, _ in group]
+    if not hasher.wait_all(cancel_token):
+        cancel_token.check()
+    full_hashes = {job.path: job.sha256 for job in jobs if job.sha256 is not None}
+
+    # 4. 같은 해시의 첫 파일만 남김 (입력 순서 유지)
+    for group in candidates:
+        first_by_hash: dict[str, Path] = {}
+        for file, size, _ in group:
+            sha256 = full_hashes.get(file)
+            if sha256 is None:
+                continue
+            if sha256 in first_by_hash:
+                result.skipped[file] = first_by_hash[sha256]
+                result.bytes_saved += size
+            else:
+                first_by_hash[sha256] = file
+
+    return result
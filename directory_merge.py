@@ -1,117 +1,23 @@
-import os
-import shutil
 from pathlib import Path
 import tkinter as tk
 from tkinter import messagebox, filedialog
 import multi_selector  # 우리가 만든 multi_selector 모듈
-from datetime import datetime
-import random
-import glob  # glob 모듈 추가
-from collections import defaultdict
-
-class FileNameTemplate:
-    def __init__(self, template: str, original_name: str):
-        self.template = template
-        self.original_name = original_name
-        self.original_name_without_ext, self.original_ext = os.path.splitext(original_name)
-
-    def generate(self, count: int = 1):
-        """
-        주어진 count 값에 맞춰 <NUM>을 변경한 새로운 이름을 반환합니다.
-        :param count: <NUM>에 들어갈 숫자 값
-        :return: 변경된 이름
-        """
-        name = self.template
-        name = self._apply_number(name, count)
-        name = self._apply_date(name)
-        name = self._apply_time(name)
-        name = self._apply_random(name)
-        name = self._apply_original(name)
-
-        # 확장자가 있다면 무조건 마지막에 붙도록 처리
-        if self.original_ext:
-            name += self.original_ext
-
-        return name
-
-    def _apply_number(self, name: str, num: int):
-        return name.replace("<NUM>", str(num))
-
-    def _apply_date(self, name: str):
-        if "<DATE>" in name:
-            date_str = datetime.now().strftime("%Y%m%d")
-            name = name.replace("<DATE>", date_str)
-        return name
-
-    def _apply_time(self, name: str):
-        if "<TIME>" in name:
-            time_str = datetime.now().strftime("%H%M%S")
-            name = name.replace("<TIME>", time_str)
-        return name
-
-    def _apply_random(self, name: str):
-        if "<RAND>" in name:
-            rand_str = ''.join(random.choices('abcdefghijklmnopqrstuvwxyz0123456789', k=6))
-            name = name.replace("<RAND>", rand_str)
-        return name
-
-    def _apply_original(self, name: str):
-        if "<ORIGINAL>" in name:
-            name = name.replace("<ORIGINAL>", self.original_name_without_ext)
-        return name
-
-
-def apply_template(directories: list[Path], template: str, apply_template_to_non_duplicate: bool, file_pattern: str):
-    all_files = set()  # 전체 파일명을 저장하는 집합
-    name_counts = defaultdict(int)  # 파일 등장 횟수
-    duplicate_files = set()  # 중복된 파일을 저장하는 집합
-    sorted_directories = sorted(directories)  # 정렬된 디렉터리 리스트
-    file_name_templates = {}  # 원본 파일 -> 새 파일명 매핑
-
-    # 1. 모든 파일을 가져오고 중복된 파일을 찾기
-    files_by_parent = defaultdict(list)
-    for directory in sorted_directories:
-        files = glob.glob(str(directory / file_pattern))
-        for file_path in files:
-            file = Path(file_path)
-            files_by_parent[directory].append(file)
-            full_name = file.name
-            name_counts[full_name] += 1
-            if name_counts[full_name] > 1:
-                duplicate_files.add(full_name)
-
-    # 2. 템플릿 수정 (필요한 경우 "_<NUM>" 추가)
-    if "<NUM>" not in template and "<RAND>" not in template:
-        template += "_<NUM>"
-
-    # 3. 각 파일에 대해 템플릿 적용
-    global_counter = defaultdict(int)  # 파일별 글로벌 카운터 (중복 발생 시 사용)
-    for directory in sorted_directories:
-        for file in files_by_parent[directory]:
-            full_name = file.name
-            if not apply_template_to_non_duplicate and full_name not in duplicate_files:
-                # 중복되지 않은 파일이고, apply_template_to_non_duplicate가 False이면 원래 이름 유지
-                new_name = full_name
-            else:
-                count = global_counter[full_name] + 1
-                global_counter[full_name] = count
-
-                filename_generator = FileNameTemplate(template, full_name)
-                new_name = filename_generator.generate(count)
-
-                # 중복 방지를 위해 이름이 이미 존재하면 숫자를 증가시키면서 반복
-                while new_name in all_files:
-                    count += 1
-                    global_counter[full_name] = count
-                    new_name = filename_generator.generate(count)
-
-            all_files.add(new_name)
-            file_name_templates[file] = new_name
-
-    return file_name_templates
-
-
-def update_preview(source_directories, template, apply_template_to_non_duplicate, file_pattern, listbox_orig, listbox_new):
+from scan_index import ScanIndex
+from copy_engine import CopyResult, DEFAULT_WORKERS, DEFAULT_MODE, TRANSFER_MODES, DEFAULT_DURABILITY, DURABILITY_MODES
+from dedup import DedupResult, HashCache
+from background_task import BackgroundTask, Debouncer
+from virtual_listbox import VirtualListbox, MappedRows
+# 계획/복사 로직은 tkinter 없이 쓸 수 있도록 merge_core에 있음 (기존 import 경로 호환용으로 다시 내보냄)
+from merge_core import (
+    CompiledTemplate, FileNameTemplate, NameAllocator, NameCollisionError,
+    apply_template, iter_plan, merge_files, resume_merge, find_content_duplicates,
+)
+from merge_journal import MergeJournal
+from merge_verify import MANIFEST_NAME, CopyVerifier
+from plan_preview import PlanPreview, PreviewUpdate
+from merge_events import EventBus, MergeStats
+
+def update_preview(source_directories, template, apply_template_to_non_duplicate, file_pattern, listbox_orig, listbox_new, scan_index: ScanIndex | None = None):
     # 소스 디렉토리만 선택된 경우에도 미리보기는 정상적으로 업데이트되도록 수정
     if not source_directories:
         return
@@ -120,7 +26,7 @@ def update_preview(source_directories, template, apply_template_to_non_duplicate
     listbox_new.delete(0, tk.END)
 
     # 타겟 디렉토리가 선택되지 않더라도 미리보기만 업데이트
-    file_name_templates = apply_template(source_directories, template, apply_template_to_non_duplicate, file_pattern)
+    file_name_templates = apply_template(source_directories, template, apply_template_to_non_duplicate, file_pattern, scan_index)
 
     for original_file, new_name in file_name_templates.items():
         listbox_orig.insert(tk.END, f"{original_file.parent.name}/{original_file.name}")
@@ -129,23 +35,53 @@ def update_preview(source_directories, template, apply_template_to_non_duplicate
 
 
 
-def copy_files_to_target(directories: list[Path], target_dir: Path, template: str, apply_template_to_non_duplicate: bool, file_pattern: str):
+def report_copy_result(result: CopyResult, dedup_result: DedupResult | None = None):
+    """복사 결과를 메시지 박스로 알림"""
+    for file, target_file, error in result.errors:
+        print(f"파일 복사 실패: {file} -> {target_file}: {error}")
+
+    details = ""
+    if dedup_result is not None and dedup_result.skipped:
+        for skipped, kept in dedup_result.skipped.items():
+            print(f"내용 중복으로 건너뜀: {skipped} (= {kept})")
+        details = f"\n내용이 같아 건너뛴 파일 {len(dedup_result.skipped)}개 ({dedup_result.bytes_saved / 1024 / 1024:.1f} MB 절약)"
+
+    verification = result.verification
+    if verification is not None:
+        for source, target in verification.mismatched:
+            print(f"내용이 다름: {source} -> {target}")
+        for path, error in verification.errors:
+            print(f"검증 실패: {path}: {error}")
+        unchecked = max(0, result.copied - verification.checked)  # 복사됐지만 검증 결과가 없는 파일
+        details += (f"\n검증: 일치 {verification.verified}개, 불일치 {len(verification.mismatched)}개, 오류 {len(verification.errors)}개"
+                    f"{f', 확인되지 않음 {unchecked}개' if unchecked else ''}"
+                    f"\n체크섬 목록: {verification.manifest_path}")
+        if (verification.failed or unchecked) and not result.cancelled and not result.errors:
+            messagebox.showwarning("검증 실패", f"복사한 파일 중 {verification.failed + unchecked}개가 원본과 다르거나 확인하지 못했습니다.{details}")
+            return
+
+    if result.cancelled:
+        messagebox.showwarning("취소", f"복사가 취소되었습니다. (복사됨 {result.copied}개, 실패 {result.failed}개){details}")
+    elif result.errors:
+        messagebox.showwarning("완료", f"파일 {result.copied}개를 복사했고 {result.failed}개는 실패했습니다.{details}")
+    else:
+        messagebox.showinfo("완료", f"파일 복사가 완료되었습니다.{details}")
+
+
+def copy_files_to_target(directories: list[Path], target_dir: Path, template: str, apply_template_to_non_duplicate: bool, file_pattern: str, scan_index: ScanIndex | None = None, workers: int = DEFAULT_WORKERS,
+                         verify: bool = False):
     # 타겟 디렉토리가 반드시 선택되어야 복사가 진행되도록 수정
     if not target_dir:
         messagebox.showwarning("경고", "대상 디렉토리를 선택하지 않았습니다.")
         return
 
-    target_dir.mkdir(parents=True, exist_ok=True)
-    file_name_templates = apply_template(directories, template, apply_template_to_non_duplicate, file_pattern)
-
-    for file, new_name in file_name_templates.items():
-        target_file = target_dir / new_name
-        shutil.copy(file, target_file)
-        print(f"파일 복사됨: {file} -> {target_file}")
-
-    messagebox.showinfo("완료", "파일 복사가 완료되었습니다.")
+    verifier = CopyVerifier(target_dir / MANIFEST_NAME) if verify else None
+    result = merge_files(directories, target_dir, template, apply_template_to_non_duplicate, file_pattern, scan_index, workers, verifier=verifier)
+    report_copy_result(result)
 
 class FileRenameApp:
+    PREVIEW_DELAY_MS = 250  # 입력이 멈춘 뒤 미리보기를 계산하기까지 대기 시간
+
     def __init__(self, root: tk.Tk):
         self.root: tk.Tk = root
         self.root.title("파일 이름 변경 및 합치기")
@@ -153,6 +89,11 @@ class FileRenameApp:
         # 변수 선언
         self.source_directories = []
         self.target_directory = None
+        self.scan_index = ScanIndex()  # 키 입력마다 디렉토리를 다시 읽지 않도록 스캔 결과를 캐시
+        self.preview = PlanPreview(self.scan_index)  # 템플릿만 바뀌면 스캔 없이 바뀐 행만 갱신
+        self.preview_task: BackgroundTask | None = None  # 진행 중인 미리보기 계산
+        self.copy_task: BackgroundTask | None = None  # 진행 중인 복사 작업
+        self.preview_debouncer = Debouncer(self.root, self.PREVIEW_DELAY_MS, self.update_preview)
 
         # UI 구성
         self.create_widgets()
@@ -208,7 +149,7 @@ class FileRenameApp:
         template_description = tk.Label(self.top_frame, text="템플릿 규칙\n<ORIGINAL> - 원본 이름\n<NUM> - 숫자\n<DATE> - 날짜\n<TIME> - 시간\n<RAND> - 랜덤")
         template_description.grid(row=6, column=0, pady=5, sticky="ew")
 
-        tk.Label(self.top_frame, text="파일 선택 와일드카드 패턴 (예: *.txt):").grid(row=7, column=0, pady=5, sticky="ew")
+        tk.Label(self.top_frame, text="파일 선택 와일드카드 패턴 (예: *.txt, **/*.jpg;!**/thumbs/**):").grid(row=7, column=0, pady=5, sticky="ew")
         self.pattern_entry = tk.Entry(self.top_frame, width=50)
         self.pattern_entry.insert(0, "*.*")
         self.pattern_entry.grid(row=8, column=0, pady=5, sticky="ew")
@@ -218,14 +159,19 @@ class FileRenameApp:
         tk.Radiobutton(self.top_frame, text="중복된 파일에만 템플릿 적용", variable=self.apply_template_var, value=0).grid(row=9, column=0, pady=5, sticky="ew")
         tk.Radiobutton(self.top_frame, text="모든 파일에 템플릿 적용", variable=self.apply_template_var, value=1).grid(row=10, column=0, pady=5, sticky="ew")
 
+        # 디렉토리 내용이 바뀌었을 때 캐시를 비우고 다시 읽기
+        self.btn_rescan = tk.Button(self.top_frame, text="디렉토리 다시 스캔", command=self.on_rescan)
+        self.btn_rescan.grid(row=11, column=0, pady=5, sticky="ew")
+
     def create_listbox_widgets(self):
         """미리보기 Listbox 및 스크롤바를 설정"""
-        rowspan = 11
+        rowspan = 12
         # Listbox와 스크롤바를 top_frame의 1, 2, 3번 열에 배치
-        self.listbox_orig = tk.Listbox(self.top_frame, width=50, selectmode=tk.SINGLE)
+        # 보이는 행만 그리는 가상 리스트박스라 파일이 수백만 개여도 미리보기가 가벼움
+        self.listbox_orig = VirtualListbox(self.top_frame, width=50, selectmode=tk.SINGLE)
         self.listbox_orig.grid(row=0, column=1, padx=5, pady=10, sticky="ns", rowspan=rowspan)  # rowspan으로 세로로 확장
 
-        self.listbox_new = tk.Listbox(self.top_frame, width=50, selectmode=tk.SINGLE)
+        self.listbox_new = VirtualListbox(self.top_frame, width=50, selectmode=tk.SINGLE)
         self.listbox_new.grid(row=0, column=2, padx=0, pady=10, sticky="ns", rowspan=rowspan)  # rowspan으로 세로로 확장
 
         # 스크롤바 추가
@@ -244,8 +190,38 @@ class FileRenameApp:
 
     def create_control_buttons(self):
         """실행 버튼을 설정"""
-        btn_start = tk.Button(self.bottom_frame, width=20, text="파일 합치기 시작", command=self.on_start_copy)
-        btn_start.grid(row=0, column=0, pady=20, columnspan=2)
+        self.btn_start = tk.Button(self.bottom_frame, width=20, text="파일 합치기 시작", command=self.on_start_copy)
+        self.btn_start.grid(row=0, column=0, pady=20, sticky="e")
+
+        self.btn_cancel = tk.Button(self.bottom_frame, width=10, text="취소", command=self.on_cancel_copy, state=tk.DISABLED)
+        self.btn_cancel.grid(row=0, column=1, pady=20, padx=5, sticky="w")
+
+        # 전송 방식 (auto: 같은 파일 시스템이면 reflink, 아니면 copy)
+        tk.Label(self.bottom_frame, text="전송 방식:").grid(row=2, column=0, sticky="e")
+        self.mode_var = tk.StringVar(value=DEFAULT_MODE)
+        tk.OptionMenu(self.bottom_frame, self.mode_var, *TRANSFER_MODES).grid(row=2, column=1, sticky="w")
+
+        # 내구성 (none: fsync 안 함, batched: 여러 파일마다 모아서 fsync, strict: 파일마다 fsync)
+        tk.Label(self.bottom_frame, text="내구성 (fsync):").grid(row=3, column=0, sticky="e")
+        self.durability_var = tk.StringVar(value=DEFAULT_DURABILITY)
+        tk.OptionMenu(self.bottom_frame, self.durability_var, *DURABILITY_MODES).grid(row=3, column=1, sticky="w")
+
+        # 내용이 같은 파일은 한 번만 복사
+        self.dedup_var = tk.IntVar(value=0)
+        tk.Checkbutton(self.bottom_frame, text="내용이 같은 파일은 한 번만 복사", variable=self.dedup_var).grid(row=4, column=0, columnspan=2)
+
+        # 복사와 동시에 sha256으로 검증하고 대상 디렉토리에 체크섬 목록 저장
+        self.verify_var = tk.IntVar(value=0)
+        tk.Checkbutton(self.bottom_frame, text="복사한 파일 검증 (sha256 체크섬 목록 저장)", variable=self.verify_var).grid(row=5, column=0, columnspan=2)
+
+        # 미리보기 계산/복사 진행 상황
+        self.status_label = tk.Label(self.bottom_frame, text="")
+        self.status_label.grid(row=6, column=0, columnspan=2)
+
+        # 동시 복사 개수 설정
+        tk.Label(self.bottom_frame, text="동시 복사 개수:").grid(row=1, column=0, sticky="e")
+        self.workers_var = tk.IntVar(value=DEFAULT_WORKERS)
+        tk.Spinbox(self.bottom_frame, from_=1, to=64, width=5, textvariable=self.workers_var).grid(row=1, column=1, sticky="w")
 
         # 중앙 정렬을 위한 grid 설정
         self.bottom_frame.grid_columnconfigure(0, weight=1)
@@ -254,11 +230,24 @@ class FileRenameApp:
 
     def on_mouse_wheel(self, event):
         """마우스 휠 이벤트 처리"""
-        delta = -1 * (event.delta // 120)  # Windows/Mac에서는 120 단위로 동작
+        if event.num == 4:  # X11은 휠을 Button-4/5로 보냄
+            delta = -1
+        elif event.num == 5:
+            delta = 1
+        else:
+            delta = -1 * (event.delta // 120)  # Windows/Mac에서는 120 단위로 동작
         self.listbox_orig.yview_scroll(delta, "units")
         self.listbox_new.yview_scroll(delta, "units")
         return "break"
 
+    def on_page_key(self, event: tk.Event):
+        """PageUp/PageDown/Home/End를 두 리스트박스에 함께 적용"""
+        total = self.listbox_orig.size()
+        number, what = {"Prior": (-1, "pages"), "Next": (1, "pages"), "Home": (-total, "units"), "End": (total, "units")}[event.keysym]
+        self.listbox_orig.yview_scroll(number, what)
+        self.listbox_new.yview_scroll(number, what)
+        return "break"
+
     def on_arrow_key(self, event:tk.Event):
         """방향키 이벤트 처리"""
         widget = event.widget  # 현재 키 입력이 발생한 위젯 (listbox_orig or listbox_new)
@@ -301,13 +290,16 @@ class FileRenameApp:
     def bind_events(self):
         """이벤트 핸들러를 바인딩"""
         # 이벤트 핸들러 연결
-        self.template_entry.bind("<KeyRelease>", lambda e: self.update_preview())
-        self.pattern_entry.bind("<KeyRelease>", lambda e: self.update_preview())
-        self.apply_template_var.trace_add("write", lambda *args: self.update_preview())
+        self.template_entry.bind("<KeyRelease>", lambda e: self.preview_debouncer.trigger())
+        self.pattern_entry.bind("<KeyRelease>", lambda e: self.preview_debouncer.trigger())
+        self.apply_template_var.trace_add("write", lambda *args: self.preview_debouncer.trigger())
 
         # 키보드 및 마우스 이벤트 바인딩
-        self.listbox_orig.bind("<MouseWheel>", self.on_mouse_wheel)
-        self.listbox_new.bind("<MouseWheel>", self.on_mouse_wheel)
+        for listbox in (self.listbox_orig, self.listbox_new):
+            for sequence in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+                listbox.bind(sequence, self.on_mouse_wheel)
+            for sequence in ("<Prior>", "<Next>", "<Home>", "<End>"):
+                listbox.bind(sequence, self.on_page_key)
         self.listbox_orig.bind("<Up>", self.on_arrow_key)
         self.listbox_orig.bind("<Down>", self.on_arrow_key)
         self.listbox_new.bind("<Up>", self.on_arrow_key)
@@ -351,27 +343,61 @@ class FileRenameApp:
         self.update_preview()
 
     def update_preview(self):
-        """미리보기 리스트 업데이트"""
+        """미리보기 리스트 업데이트 (계산은 작업 스레드에서 수행)"""
         if not self.source_directories:
             return
 
         template = self.template_entry.get()
         apply_template_to_non_duplicate = self.apply_template_var.get() == 1
         file_pattern = self.pattern_entry.get()
-
-        file_name_templates = apply_template(
-            [Path(dir) for dir in self.source_directories], template, apply_template_to_non_duplicate, file_pattern
-        )
-
-        self.listbox_orig.delete(0, tk.END)
-        self.listbox_new.delete(0, tk.END)
-
-        for orig, new in file_name_templates.items():
-            # 부모 디렉토리 이름과 파일 이름을 결합하여 표시
-            parent_dir_name = orig.parent.name
-            self.listbox_orig.insert(tk.END, f"{parent_dir_name}/{orig.name}")
-            self.listbox_new.insert(tk.END, new)
-
+        directories = [Path(dir) for dir in self.source_directories]
+
+        # 이전 계산은 더 이상 필요 없으므로 취소
+        self.cancel_preview()
+        self.status_label.config(text="미리보기 계산 중...")
+
+        self.preview_task = BackgroundTask(
+            self.root,
+            lambda token, report: self.preview.compute(directories, template, apply_template_to_non_duplicate, file_pattern, token),
+            on_done=self.show_preview,
+            on_error=self.on_preview_error,
+        ).start()
+
+    def cancel_preview(self):
+        """진행 중인 미리보기 계산을 중단"""
+        if self.preview_task is not None:
+            self.preview_task.cancel()
+            self.preview_task = None
+
+    def on_preview_error(self, error: BaseException):
+        self.status_label.config(text="")
+        if isinstance(error, NameCollisionError):
+            messagebox.showerror("오류", str(error))
+        else:
+            messagebox.showerror("오류", f"미리보기를 계산하지 못했습니다: {error}")
+
+    def show_preview(self, update: PreviewUpdate):
+        """계산된 계획을 가상 리스트박스에 연결 (보이는 행만 그려짐)"""
+        self.preview_task = None
+        self.preview.accept(update)
+        plan = update.plan
+        new_names = MappedRows(range(len(plan)), plan.new_name)
+        if update.changed is None:
+            # 원본 파일 목록이 바뀌었으면 전체를 다시 연결
+            # 부모 디렉토리 이름과 파일 이름을 결합하여 표시 (보이는 행만 문자열로 만듦)
+            self.listbox_orig.set_rows(MappedRows(range(len(plan)), plan.display_name))
+            self.listbox_new.set_rows(new_names)
+            self.status_label.config(text=f"파일 {len(plan)}개")
+        else:
+            # 파일 목록이 같으면 원본 목록은 그대로 두고, 새 이름 중 바뀐 행만 다시 그림
+            self.listbox_new.replace_rows(new_names, update.changed)
+            self.status_label.config(text=f"파일 {len(plan)}개 (바뀐 이름 {len(update.changed)}개)")
+
+    def on_rescan(self):
+        """스캔 캐시를 비우고 미리보기 다시 계산"""
+        self.scan_index.rescan()
+        self.preview.reset()
+        self.update_preview()
 
     def on_start_copy(self):
         """파일 복사 실행"""
@@ -386,12 +412,105 @@ class FileRenameApp:
         apply_template_to_non_duplicate = self.apply_template_var.get() == 1
         file_pattern = self.pattern_entry.get()
 
-        copy_files_to_target(
-            [Path(dir) for dir in self.source_directories], Path(self.target_directory), template, apply_template_to_non_duplicate, file_pattern
-        )
+        directories = [Path(dir) for dir in self.source_directories]
+        target_dir = Path(self.target_directory)
+        workers = self.get_workers()
+        dedup = self.dedup_var.get() == 1
+        verify = self.verify_var.get() == 1
+        mode = self.mode_var.get()
+        durability = self.durability_var.get()
+        scan_index = self.scan_index
+
+        # 중단된 작업 기록이 있으면 이어서 복사할지 확인
+        resume = False
+        if MergeJournal.exists(target_dir):
+            answer = messagebox.askyesnocancel("이어서 복사", "대상 디렉토리에 중단된 복사 작업이 있습니다.\n이전 계획대로 남은 파일만 이어서 복사할까요?\n(아니요: 새로 시작)")
+            if answer is None:
+                return
+            resume = answer
+
+        # 처리량과 남은 시간은 이벤트를 집계해서 표시
+        events = EventBus()
+        stats = MergeStats()
+        events.subscribe(stats)
+
+        def run(token, report):
+            hash_cache = HashCache() if dedup or verify else None
+            try:
+                return copy(token, report, hash_cache)
+            finally:
+                if hash_cache is not None:
+                    hash_cache.close()
+
+        def copy(token, report, hash_cache):
+            verifier = CopyVerifier(target_dir / MANIFEST_NAME, hash_cache) if verify else None
+            if resume:
+                return resume_merge(target_dir, workers, token, lambda done, total: report(stats.format()), mode, events, durability, verifier), None
+
+            dedup_result = None
+            if dedup:
+                report("내용이 같은 파일 찾는 중...")
+                dedup_result = find_content_duplicates(directories, file_pattern, scan_index, hash_cache, token)
+            result = merge_files(
+                directories, target_dir, template, apply_template_to_non_duplicate, file_pattern, scan_index,
+                workers, token, lambda done, total: report(stats.format()),
+                set(dedup_result.skipped) if dedup_result else None, mode=mode, events=events, durability=durability, verifier=verifier
+            )
+            return result, dedup_result
+
+        self.btn_start.config(state=tk.DISABLED)
+        self.btn_cancel.config(state=tk.NORMAL)
+        self.status_label.config(text="복사 준비 중...")
+
+        self.copy_task = BackgroundTask(
+            self.root,
+            run,
+            on_done=self.on_copy_finished,
+            on_error=self.on_copy_error,
+            on_progress=self.on_copy_progress,
+            on_cancelled=self.on_copy_finished,
+        ).start()
+
+    def on_copy_progress(self, items: list[str]):
+        self.status_label.config(text=items[-1])  # 가장 최근 진행 상황만 표시
+
+    def on_copy_finished(self, results: tuple[CopyResult, DedupResult | None] | None):
+        self.reset_copy_controls()
+        if results is None:
+            messagebox.showwarning("취소", "복사가 취소되었습니다.")
+        else:
+            report_copy_result(*results)
+
+    def on_copy_error(self, error: BaseException):
+        self.reset_copy_controls()
+        messagebox.showerror("오류", f"복사하지 못했습니다: {error}")
+
+    def on_cancel_copy(self):
+        """복사 취소 (진행 중인 파일까지만 복사)"""
+        if self.copy_task is not None:
+            self.copy_task.cancel()
+            self.btn_cancel.config(state=tk.DISABLED)
+            self.status_label.config(text="취소 중...")
+
+    def reset_copy_controls(self):
+        self.copy_task = None
+        self.preview.reset()  # 이동 등으로 소스가 바뀌었을 수 있으므로 다음 미리보기는 다시 스캔
+        self.btn_start.config(state=tk.NORMAL)
+        self.btn_cancel.config(state=tk.DISABLED)
+        self.status_label.config(text="")
+
+    def get_workers(self) -> int:
+        """동시 복사 개수 (잘못된 입력이면 기본값)"""
+        try:
+            return max(1, self.workers_var.get())
+        except tk.TclError:
+            return DEFAULT_WORKERS
 
     def on_close(self):
         """창 닫기 이벤트"""
+        self.cancel_preview()
+        if self.copy_task is not None:
+            self.copy_task.cancel()
         self.root.destroy()
         import sys
         sys.exit(0)
@@ -0,0 +1,234 @@
+"""
+tkinter 없이 실행하는 명령줄 진입점 (cron, 디스플레이가 없는 서버용)
+
+예)
+    python merge_cli.py src1 src2 --target out --template "<ORIGINAL>_<NUM>"
+    python merge_cli.py src1 src2 --plan > plan.jsonl
+    python merge_cli.py src1 src2 --save-plan plan.gz
+    python merge_cli.py --target out --load-plan plan.gz
+    python merge_cli.py src1 src2 --archive out.tar.gz
+    python merge_cli.py --target out --resume
+    python merge_cli.py src1 src2 --target out --verify
+    python merge_cli.py --check out/.mergefile.sha256
+"""
+import sys
+import json
+import time
+import argparse
+from pathlib import Path
+
+from copy_engine import DEFAULT_WORKERS, DEFAULT_MODE, TRANSFER_MODES, DEFAULT_DURABILITY, DURABILITY_MODES
+from dedup import DEFAULT_CACHE_PATH, HashCache
+from merge_events import EventBus, MergeStats, ConsoleReporter, JsonlEventLog, profile_run
+from merge_core import (
+    iter_plan, apply_template, merge_files, copy_plan, merge_to_archive, archive_plan, resume_merge, find_content_duplicates, NameCollisionError,
+)
+from archive_output import ARCHIVE_SUFFIXES
+from merge_plan import MergePlan
+from merge_verify import MANIFEST_NAME, CopyVerifier, VerifyResult, verify_manifest
+
+DEFAULT_TEMPLATE = "<ORIGINAL>_<NUM>_<DATE>_<TIME>_<RAND>"
+DEFAULT_PATTERN = "*.*"
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="여러 디렉토리의 파일을 템플릿에 맞춰 이름을 바꾸며 하나로 합칩니다.")
+    parser.add_argument("sources", nargs="*", type=Path, help="소스 디렉토리 (--resume, --load-plan이면 생략)")
+    parser.add_argument("-t", "--target", type=Path, help="대상 디렉토리 (--plan, --save-plan, --archive가 아니면 필수)")
+    parser.add_argument("--archive", type=Path,
+                        help=f"대상 디렉토리 대신 압축 파일 하나로 바로 기록 (확장자로 형식 결정: {', '.join(ARCHIVE_SUFFIXES)})")
+    parser.add_argument("--template", default=DEFAULT_TEMPLATE, help=f"파일 이름 템플릿 (기본값: {DEFAULT_TEMPLATE})")
+    parser.add_argument("--pattern", default=DEFAULT_PATTERN, help=f"파일 선택 와일드카드 패턴. '**'는 하위 디렉토리, ';'로 여러 개, '!'로 제외 (기본값: {DEFAULT_PATTERN})")
+    parser.add_argument("--duplicates-only", action="store_true", help="이름이 중복된 파일에만 템플릿 적용")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help=f"동시 복사 개수 (기본값: {DEFAULT_WORKERS})")
+    parser.add_argument("--mode", choices=TRANSFER_MODES, default=DEFAULT_MODE,
+                        help=f"전송 방식 (기본값: {DEFAULT_MODE}, 같은 파일 시스템이면 reflink 시도)")
+    parser.add_argument("--durability", choices=DURABILITY_MODES, default=DEFAULT_DURABILITY,
+                        help=f"fsync 수준: none(안 함), batched(여러 파일마다 모아서), strict(파일마다) (기본값: {DEFAULT_DURABILITY})")
+    parser.add_argument("--plan", action="store_true", help="복사하지 않고 이름 변경 계획을 JSONL로 출력")
+    parser.add_argument("--save-plan", type=Path, help="복사하지 않고 계획을 압축된 계획 파일로 저장")
+    parser.add_argument("--load-plan", type=Path, help="--save-plan으로 저장한 계획대로 복사 (소스 디렉토리를 다시 읽지 않음)")
+    parser.add_argument("--resume", action="store_true", help="대상 디렉토리의 작업 기록을 불러와 남은 파일만 복사")
+    parser.add_argument("--no-journal", action="store_true", help="이어서 복사하기 위한 작업 기록을 남기지 않음")
+    parser.add_argument("--progress", action="store_true", help="진행 상황(파일/s, MB/s, 남은 시간)을 주기적으로 출력")
+    parser.add_argument("--events-log", type=Path, help="모든 병합 이벤트를 JSONL로 기록할 경로")
+    parser.add_argument("--profile", type=Path, help="cProfile 결과(pstats)를 저장할 경로")
+    parser.add_argument("--trace-memory", action="store_true", help="tracemalloc으로 최대 메모리 사용량 출력")
+    parser.add_argument("--dedup", action="store_true", help="내용이 같은 파일은 한 번만 복사")
+    parser.add_argument("--hash-cache", type=Path, default=DEFAULT_CACHE_PATH, help=f"--dedup/--verify/--check 해시 캐시 파일 (기본값: {DEFAULT_CACHE_PATH})")
+    parser.add_argument("--dedup-report", type=Path, help="--dedup으로 건너뛴 파일 목록을 저장할 경로")
+    parser.add_argument("--verify", action="store_true", help="복사와 동시에 원본과 대상의 sha256을 비교하고 체크섬 목록(sha256sum 형식)을 남김")
+    parser.add_argument("--manifest", type=Path, help=f"--verify 체크섬 목록 경로 (기본값: 대상 디렉토리의 {MANIFEST_NAME})")
+    parser.add_argument("--check", type=Path, metavar="MANIFEST",
+                        help="복사하지 않고 체크섬 목록대로 대상과 원본을 다시 확인 (크기/mtime이 그대로인 파일은 캐시 사용)")
+    parser.add_argument("--processes", type=int, help="해시 계산 프로세스 수 (기본값: CPU 수)")
+    return parser
+
+
+def run_dedup(args) -> set[Path] | None:
+    """--dedup이면 내용이 같은 파일을 찾아 보고하고, 계획에서 뺄 파일 집합을 반환"""
+    if not args.dedup:
+        return None
+
+    cache = HashCache(args.hash_cache)
+    try:
+        dedup_result = find_content_duplicates(args.sources, args.pattern, hash_cache=cache)
+    finally:
+        cache.close()
+
+    print(f"내용 중복으로 건너뜀 {len(dedup_result.skipped)}개 ({dedup_result.bytes_saved} 바이트)", file=sys.stderr)
+    if args.dedup_report:
+        with open(args.dedup_report, "w", encoding="utf-8") as report:
+            dedup_result.write_report(report)
+    return set(dedup_result.skipped)
+
+
+def write_plan(args, exclude: set[Path] | None = None, events: EventBus | None = None, out=sys.stdout):
+    """
+    계획을 찾는 즉시 한 줄씩 JSONL로 출력.
+    ASCII로만 출력하므로 디코딩할 수 없는 파일명(surrogateescape)도 \\udcXX로 남아 UTF-8 출력에서 실패하지 않음
+    """
+    for file, new_name in iter_plan(args.sources, args.template, not args.duplicates_only, args.pattern, exclude=exclude, events=events):
+        out.write(json.dumps({"source": str(file), "name": new_name}) + "\n")
+
+
+def save_plan(args, exclude: set[Path] | None = None, events: EventBus | None = None):
+    """계획을 MergePlan 파일로 저장"""
+    plan = apply_template(args.sources, args.template, not args.duplicates_only, args.pattern, exclude=exclude, events=events)
+    plan.save(args.save_plan)
+    print(f"계획 저장됨: 파일 {len(plan)}개 -> {args.save_plan}", file=sys.stderr)
+
+
+def report_verification(verification: VerifyResult, expected: int | None = None) -> int:
+    """
+    검증 결과를 출력하고, 문제가 있으면 1을 반환
+    :param expected: 검증되어야 할 파일 수 (복사된 파일 수). 결과가 나온 파일이 이보다 적으면 실패로 봄
+    """
+    unchecked = max(0, expected - verification.checked) if expected is not None else 0
+    if unchecked:
+        print(f"검증되지 않은 파일 {unchecked}개 (복사됨 {expected}개, 확인됨 {verification.checked}개)", file=sys.stderr)
+    for source, target in verification.mismatched:
+        print(f"내용이 다름: {source} -> {target}", file=sys.stderr)
+    for path, error in verification.errors:
+        print(f"검증 실패: {path}: {error}", file=sys.stderr)
+    target_only = f", 원본 없음 {verification.target_only}개" if verification.target_only else ""
+    cancelled = " (취소됨)" if verification.cancelled else ""
+    print(f"검증됨 {verification.verified}개, 불일치 {len(verification.mismatched)}개, 오류 {len(verification.errors)}개{target_only}{cancelled}"
+          f" -> {verification.manifest_path}", file=sys.stderr)
+    return 1 if verification.failed or verification.cancelled or unchecked else 0
+
+
+def run_check(args) -> int:
+    """--check: 체크섬 목록대로 다시 확인"""
+    cache = HashCache(args.hash_cache)
+    try:
+        verification = verify_manifest(args.check, cache, args.processes)
+    finally:
+        cache.close()
+    return report_verification(verification)
+
+
+def run_copy(args, exclude: set[Path] | None = None, events: EventBus | None = None) -> int:
+    if args.verify:
+        cache = HashCache(args.hash_cache)
+        try:
+            return run_copy_with(args, exclude, events, CopyVerifier(args.manifest or args.target / MANIFEST_NAME, cache, args.processes))
+        finally:
+            cache.close()
+    return run_copy_with(args, exclude, events)
+
+
+def load_plan(path: Path, events: EventBus | None = None) -> MergePlan:
+    """--load-plan으로 저장된 계획을 불러옵니다. 계획을 세우는 단계를 대신하므로 plan_built를 보내 진행률/ETA가 전체 파일 수를 알게 함"""
+    started_at = time.perf_counter()
+    plan = MergePlan.load(path)
+    if events is not None:
+        events.emit("plan_built", files=len(plan), seconds=time.perf_counter() - started_at)
+    return plan
+
+
+def run_copy_with(args, exclude: set[Path] | None = None, events: EventBus | None = None, verifier: CopyVerifier | None = None) -> int:
+    started_at = time.perf_counter()
+    if args.resume:
+        result = resume_merge(args.target, workers=args.workers, mode=args.mode, events=events, durability=args.durability, verifier=verifier)
+    elif args.load_plan and args.archive:
+        result = archive_plan(load_plan(args.load_plan, events), args.archive, workers=args.workers, events=events, durability=args.durability)
+    elif args.load_plan:
+        result = copy_plan(load_plan(args.load_plan, events), args.target, workers=args.workers, journal=not args.no_journal, mode=args.mode, events=events,
+                           durability=args.durability, verifier=verifier)
+    elif args.archive:
+        result = merge_to_archive(args.sources, args.archive, args.template, not args.duplicates_only, args.pattern, workers=args.workers,
+                                  exclude=exclude, events=events, durability=args.durability)
+    else:
+        result = merge_files(args.sources, args.target, args.template, not args.duplicates_only, args.pattern, workers=args.workers,
+                             exclude=exclude, journal=not args.no_journal, mode=args.mode, events=events, durability=args.durability, verifier=verifier)
+    seconds = time.perf_counter() - started_at
+    if not args.progress:
+        # --progress이면 ConsoleReporter가 이미 출력함
+        for file, target_file, error in result.errors:
+            print(f"파일 복사 실패: {file} -> {target_file}: {error}", file=sys.stderr)
+    modes = ", ".join(f"{mode} {count}개" for mode, count in sorted(result.by_mode.items()))
+    print(f"복사됨 {result.copied}개 ({modes}), 실패 {result.failed}개", file=sys.stderr)
+    if seconds > 0:
+        print(f"내구성 {args.durability}: {seconds:.2f}s, {result.copied / seconds:.1f} 파일/s, {result.bytes_copied / 1024 / 1024 / seconds:.1f} MB/s",
+              file=sys.stderr)
+    status = 1 if result.errors else 0
+    if result.verification is not None:
+        status = max(status, report_verification(result.verification, result.copied))
+    return status
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.check:
+        if args.sources or args.target or args.archive or args.resume or args.plan or args.save_plan or args.load_plan or args.verify:
+            parser.error("--check는 다른 작업과 함께 쓸 수 없습니다.")
+        try:
+            return run_check(args)
+        except (FileNotFoundError, ValueError) as e:
+            print(f"오류: {e}", file=sys.stderr)
+            return 2
+    if args.verify and (args.plan or args.save_plan or args.archive):
+        parser.error("--verify는 대상 디렉토리로 복사할 때만 쓸 수 있습니다.")
+    if not args.plan and not args.save_plan and not args.archive and args.target is None:
+        parser.error("--plan, --save-plan, --archive가 아니면 --target이 필요합니다.")
+    if args.archive and (args.target or args.resume or args.plan or args.save_plan):
+        parser.error("--archive는 --target, --resume, --plan, --save-plan과 함께 쓸 수 없습니다.")
+    if not args.resume and not args.load_plan and not args.sources:
+        parser.error("소스 디렉토리가 필요합니다.")
+    if sum(map(bool, (args.resume, args.plan, args.save_plan, args.load_plan))) > 1:
+        parser.error("--resume, --plan, --save-plan, --load-plan은 함께 쓸 수 없습니다.")
+
+    events = EventBus()
+    if args.progress:
+        stats = MergeStats()
+        events.subscribe(stats)
+        events.subscribe(ConsoleReporter(stats))
+    event_log = JsonlEventLog(args.events_log) if args.events_log else None
+    if event_log:
+        events.subscribe(event_log)
+
+    try:
+        with profile_run(args.profile, args.trace_memory):
+            if args.resume or args.load_plan:
+                return run_copy(args, events=events)
+            exclude = run_dedup(args)
+            if args.plan:
+                write_plan(args, exclude, events)
+                return 0
+            if args.save_plan:
+                save_plan(args, exclude, events)
+                return 0
+            return run_copy(args, exclude, events)
+    except (NameCollisionError, OSError, ValueError) as e:
+        # OSError: 압축 파일 멤버를 쓰다 중단된 경우(ArchiveMemberError), 저널/대상 디렉토리를 만들 수 없는 경우 등
+        print(f"오류: {e}", file=sys.stderr)
+        return 2
+    finally:
+        if event_log:
+            event_log.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
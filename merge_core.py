@@ -0,0 +1,411 @@
+import os
+import re
+import time
+import random
+from collections import defaultdict
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Iterator
+
+from scan_index import ScanIndex
+from copy_engine import CopyEngine, CopyResult, DEFAULT_WORKERS, DEFAULT_MODE, DEFAULT_DURABILITY
+from pipelined_copy import PipelinedCopyEngine
+from archive_output import ArchiveWriter
+from background_task import CancelToken
+from dedup import DedupResult, HashCache, find_duplicate_content
+from merge_journal import MergeJournal
+from merge_events import EventBus
+from merge_plan import MergePlan
+from merge_verify import CopyVerifier
+
+RANDOM_CHARS = 'abcdefghijklmnopqrstuvwxyz0123456789'
+
+
+class CompiledTemplate:
+    """
+    템플릿 문자열을 한 번만 리터럴/플레이스홀더 토큰으로 분해해 둔 객체.
+    <DATE>, <TIME>은 컴파일 시점에 한 번만 기록하므로 한 번의 실행에서 모든 파일이 같은 값을 갖습니다.
+    """
+    PLACEHOLDER = re.compile(r"<(NUM|DATE|TIME|RAND|ORIGINAL)>")
+
+    def __init__(self, template: str, now: datetime | None = None, rng: random.Random | None = None):
+        self.template = template
+        self._random = rng or random  # 미리보기처럼 같은 입력에 같은 <RAND>가 필요하면 시드를 고정한 Random을 넘김
+        now = now or datetime.now()
+        values = {"DATE": now.strftime("%Y%m%d"), "TIME": now.strftime("%H%M%S")}
+
+        # 리터럴과 날짜/시간은 미리 문자열로 만들어 두고, 파일마다 바뀌는 자리만 인덱스로 기억
+        self._parts: list[str] = []
+        self._num_slots: list[int] = []
+        self._rand_slots: list[int] = []
+        self._original_slots: list[int] = []
+        position = 0
+        for match in self.PLACEHOLDER.finditer(template):
+            if match.start() > position:
+                self._parts.append(template[position:match.start()])
+            kind = match.group(1)
+            if kind in values:
+                self._parts.append(values[kind])
+            else:
+                slots = {"NUM": self._num_slots, "RAND": self._rand_slots, "ORIGINAL": self._original_slots}[kind]
+                slots.append(len(self._parts))
+                self._parts.append("")
+            position = match.end()
+        if position < len(template):
+            self._parts.append(template[position:])
+
+    @property
+    def has_num(self) -> bool:
+        return bool(self._num_slots)
+
+    @property
+    def has_rand(self) -> bool:
+        return bool(self._rand_slots)
+
+    @property
+    def uses_original(self) -> bool:
+        return bool(self._original_slots)
+
+    def render(self, original_name: str, count: int = 1) -> str:
+        """
+        원본 파일 이름과 <NUM> 값으로 새 이름을 만듭니다.
+        :param original_name: 확장자를 포함한 원본 파일 이름
+        :param count: <NUM>에 들어갈 숫자 값
+        :return: 변경된 이름
+        """
+        stem, ext = os.path.splitext(original_name)
+        return self.render_parts(stem, ext, count)
+
+    def render_parts(self, stem: str, ext: str, count: int = 1) -> str:
+        """이미 확장자를 분리한 원본 이름으로 새 이름을 만듭니다."""
+        parts = self._parts.copy()
+        if self._num_slots:
+            num_str = str(count)
+            for index in self._num_slots:
+                parts[index] = num_str
+        if self._rand_slots:
+            rand_str = ''.join(self._random.choices(RANDOM_CHARS, k=6))
+            for index in self._rand_slots:
+                parts[index] = rand_str
+        for index in self._original_slots:
+            parts[index] = stem
+
+        # 확장자가 있다면 무조건 마지막에 붙도록 처리
+        return "".join(parts) + ext
+
+
+class NameCollisionError(RuntimeError):
+    """<RAND> 템플릿으로 중복되지 않는 이름을 만들지 못했을 때 발생"""
+
+
+class NameAllocator:
+    """
+    렌더링된 기본 이름(번호/랜덤 자리를 뺀 이름)마다 다음 빈 번호를 기억해 두는 충돌 해결기.
+    같은 이름의 파일이 아무리 많아도 파일 하나당 평균 상수 시간에 새 이름을 배정합니다.
+    """
+    MAX_RAND_RETRIES = 100  # <NUM> 없이 <RAND>만 있을 때 재시도 횟수
+
+    def __init__(self, compiled_template: CompiledTemplate):
+        self.compiled_template = compiled_template
+        self.taken: set[str] = set()  # 이미 배정된 파일명
+        self._next_count: dict[str, int] = {}  # 기본 이름을 정하는 키(원본 이름 또는 확장자) -> 다음 <NUM> 값
+
+    def reserve(self, name: str):
+        """템플릿을 적용하지 않고 그대로 쓰는 이름을 미리 등록"""
+        self.taken.add(name)
+
+    def allocate(self, original_name: str) -> str:
+        """원본 파일 이름에 대해 아직 쓰이지 않은 새 이름을 배정"""
+        stem, ext = os.path.splitext(original_name)
+        render = self.compiled_template.render_parts
+
+        if self.compiled_template.has_num:
+            # 리터럴/날짜/시간은 템플릿마다 고정이므로 기본 이름은 원본 이름(<ORIGINAL>이 없으면 확장자)으로 결정됨
+            key = original_name if self.compiled_template.uses_original else ext
+            count = self._next_count.get(key, 1)
+            new_name = render(stem, ext, count)
+            while new_name in self.taken:
+                count += 1
+                new_name = render(stem, ext, count)
+            # 처음 1번을 받은 키는 기록하지 않음 (고유한 이름이 대부분인 트리에서 파일마다 항목이 남지 않도록).
+            # 같은 키가 다시 오면 1번 이름이 이미 쓰였으므로 한 번 더 비교한 뒤 2번부터 기록됨.
+            # <RAND>가 있으면 다시 만든 1번 이름이 달라 비교로 알 수 없으므로 항상 기록
+            if count > 1 or key in self._next_count or self.compiled_template.has_rand:
+                self._next_count[key] = count + 1
+        else:
+            for _ in range(self.MAX_RAND_RETRIES):
+                new_name = render(stem, ext)
+                if new_name not in self.taken:
+                    break
+            else:
+                raise NameCollisionError(
+                    f"'{original_name}'에 대해 <RAND> 이름을 {self.MAX_RAND_RETRIES}번 생성했지만 모두 중복되었습니다. "
+                    "템플릿에 <NUM>이나 <ORIGINAL>을 추가하세요."
+                )
+
+        self.taken.add(new_name)
+        return new_name
+
+
+class FileNameTemplate:
+    def __init__(self, template: str | CompiledTemplate, original_name: str):
+        self.compiled = template if isinstance(template, CompiledTemplate) else CompiledTemplate(template)
+        self.template = self.compiled.template
+        self.original_name = original_name
+        self.original_name_without_ext, self.original_ext = os.path.splitext(original_name)
+
+    def generate(self, count: int = 1):
+        """
+        주어진 count 값에 맞춰 <NUM>을 변경한 새로운 이름을 반환합니다.
+        :param count: <NUM>에 들어갈 숫자 값
+        :return: 변경된 이름
+        """
+        return self.compiled.render_parts(self.original_name_without_ext, self.original_ext, count)
+
+
+CANCEL_CHECK_INTERVAL = 4096  # 이 개수의 파일마다 취소 여부 확인
+
+
+def iter_plan(directories: list[Path], template: str, apply_template_to_non_duplicate: bool, file_pattern: str, scan_index: ScanIndex | None = None, now: datetime | None = None,
+              cancel_token: CancelToken | None = None, exclude: set[Path] | None = None, events: EventBus | None = None,
+              rng: random.Random | None = None) -> Iterator[tuple[Path, str]]:
+    """
+    (원본 파일, 새 파일명) 쌍을 찾는 즉시 하나씩 내보내는 계획 생성기.
+    전체 계획을 dict로 만들지 않으므로 큰 트리도 첫 결과가 바로 나오고 메모리는 파일명 집합만큼만 사용합니다.
+    중복된 파일에만 템플릿을 적용하는 경우에는 이름별 개수를 세기 위해 파일명만 먼저 한 번 훑습니다.
+    :param exclude: 계획에서 뺄 파일 (예: 내용 중복으로 건너뛸 파일)
+    :param events: scan_started/scan_finished/plan_built 이벤트를 받을 EventBus
+    :param rng: <RAND>에 쓸 난수 생성기 (기본값: random 모듈)
+    """
+    if scan_index is None:
+        scan_index = ScanIndex(cache=False)  # 캐시를 공유하지 않는 일회성 인덱스
+
+    started_at = time.perf_counter()
+    sorted_directories = sorted(set(directories))  # 정렬된 디렉터리 리스트
+    scanned = set()  # 스캔 이벤트를 이미 보낸 디렉토리
+
+    def match_files(directory: Path) -> Iterator[Path]:
+        # 하위 디렉토리를 읽는 중에도 찾은 파일부터 바로 계획에 넘김
+        if events is None or directory in scanned:
+            yield from scan_index.iter_matches(directory, file_pattern)
+            return
+        scanned.add(directory)
+        events.emit("scan_started", directory=directory)
+        scan_started_at = time.perf_counter()
+        count = 0
+        for file in scan_index.iter_matches(directory, file_pattern):
+            count += 1
+            yield file
+        events.emit("scan_finished", directory=directory, files=count, seconds=time.perf_counter() - scan_started_at)
+
+    # 1. 중복된 파일 찾기 (모든 파일에 템플릿을 적용할 때는 필요 없음)
+    name_counts = defaultdict(int)  # 파일 등장 횟수 (2 이상이면 중복된 파일)
+    if not apply_template_to_non_duplicate:
+        for directory in sorted_directories:
+            if cancel_token is not None:
+                cancel_token.check()
+            for file in match_files(directory):
+                if exclude and file in exclude:
+                    continue
+                name_counts[file.name] += 1
+
+    # 2. 템플릿 수정 (필요한 경우 "_<NUM>" 추가)
+    if "<NUM>" not in template and "<RAND>" not in template:
+        template += "_<NUM>"
+    compiled_template = CompiledTemplate(template, now, rng)  # 템플릿은 실행마다 한 번만 분석
+
+    allocator = NameAllocator(compiled_template)  # 전체 파일명과 다음 번호를 관리
+
+    # 원래 이름을 유지하는 파일을 먼저 등록해 템플릿으로 만든 이름과 겹치지 않도록 함
+    for name, count in name_counts.items():
+        if count == 1:
+            allocator.reserve(name)
+
+    # 3. 각 파일에 대해 템플릿 적용
+    planned = 0
+    for directory in sorted_directories:
+        for file in match_files(directory):
+            if exclude and file in exclude:
+                continue
+            if cancel_token is not None and planned % CANCEL_CHECK_INTERVAL == 0:
+                cancel_token.check()
+            full_name = file.name
+            if not apply_template_to_non_duplicate and name_counts[full_name] == 1:
+                # 중복되지 않은 파일이고, apply_template_to_non_duplicate가 False이면 원래 이름 유지
+                new_name = full_name
+            else:
+                new_name = allocator.allocate(full_name)
+
+            planned += 1
+            yield file, new_name
+
+    if events is not None:
+        events.emit("plan_built", files=planned, seconds=time.perf_counter() - started_at)
+
+
+def apply_template(directories: list[Path], template: str, apply_template_to_non_duplicate: bool, file_pattern: str, scan_index: ScanIndex | None = None, now: datetime | None = None,
+                   cancel_token: CancelToken | None = None, exclude: set[Path] | None = None, events: EventBus | None = None,
+                   rng: random.Random | None = None) -> MergePlan:
+    """원본 파일 -> 새 파일명 매핑을 한 번에 만듭니다. (iter_plan의 결과를 dict처럼 쓸 수 있는 MergePlan으로 모음)"""
+    if scan_index is None:
+        # 중복된 파일에만 템플릿을 적용하면 두 번 훑으므로 디렉토리를 다시 읽지 않도록 이번 호출 동안만 캐시
+        # (한 번만 훑을 때는 캐시가 파일명마다 문자열을 남겨 최대 메모리만 늘림)
+        scan_index = ScanIndex(cache=not apply_template_to_non_duplicate)
+    return MergePlan.from_pairs(iter_plan(directories, template, apply_template_to_non_duplicate, file_pattern, scan_index, now, cancel_token, exclude, events, rng))
+
+
+def find_content_duplicates(directories: list[Path], file_pattern: str, scan_index: ScanIndex | None = None, hash_cache: HashCache | None = None,
+                            cancel_token: CancelToken | None = None) -> DedupResult:
+    """소스 디렉토리 전체에서 내용이 같은 파일을 찾습니다. 결과의 skipped를 merge_files(exclude=...)에 넘기면 한 번만 복사됩니다."""
+    if scan_index is None:
+        scan_index = ScanIndex(cache=False)
+    files = (file for directory in sorted(set(directories)) for file in scan_index.iter_matches(directory, file_pattern))
+    return find_duplicate_content(files, hash_cache, cancel_token=cancel_token)
+
+
+def merge_files(directories: list[Path], target_dir: Path, template: str, apply_template_to_non_duplicate: bool, file_pattern: str, scan_index: ScanIndex | None = None,
+                workers: int = DEFAULT_WORKERS, cancel_token: CancelToken | None = None, on_progress: Callable[[int, int], None] | None = None,
+                exclude: set[Path] | None = None, journal: bool = True, mode: str = DEFAULT_MODE, events: EventBus | None = None,
+                durability: str = DEFAULT_DURABILITY, verifier: CopyVerifier | None = None) -> CopyResult:
+    """
+    계획을 세우고 대상 디렉토리로 복사합니다. GUI 없이 작업 스레드나 스크립트에서 호출할 수 있습니다.
+    :param on_progress: (완료된 파일 수, 전체 파일 수)를 받는 콜백. 복사 작업 스레드에서 호출됨
+    :param exclude: 복사하지 않을 파일 (find_content_duplicates의 결과 등)
+    :param journal: 계획과 진행 상황을 대상 디렉토리의 저널에 기록해 resume_merge로 이어서 복사할 수 있게 함
+    :param mode: 전송 방식 (copy_engine.TRANSFER_MODES)
+    :param durability: fsync 수준 (copy_engine.DURABILITY_MODES)
+    :param events: 스캔/계획/복사 이벤트를 받을 EventBus (merge_events 참고)
+    :param verifier: 복사한 파일을 복사와 동시에 해시로 검증하고 체크섬 목록을 남김 (결과는 CopyResult.verification)
+    :return: 복사 결과 (파일별 오류 포함)
+    """
+    plan = apply_template(directories, template, apply_template_to_non_duplicate, file_pattern, scan_index, cancel_token=cancel_token, exclude=exclude, events=events)
+    return copy_plan(plan, target_dir, workers, cancel_token, on_progress, journal, mode, events, durability, verifier)
+
+
+def copy_plan(plan: MergePlan, target_dir: Path, workers: int = DEFAULT_WORKERS, cancel_token: CancelToken | None = None,
+              on_progress: Callable[[int, int], None] | None = None, journal: bool = True, mode: str = DEFAULT_MODE, events: EventBus | None = None,
+              durability: str = DEFAULT_DURABILITY, verifier: CopyVerifier | None = None) -> CopyResult:
+    """이미 만든 계획(MergePlan.load로 불러온 계획 등)대로 대상 디렉토리에 복사합니다. 인자는 merge_files와 같습니다."""
+    target_dir.mkdir(parents=True, exist_ok=True)
+    if not journal:
+        pairs = [(file, target_dir / new_name) for file, new_name in plan.items()]
+        return _copy_pairs(pairs, workers, cancel_token, on_progress, mode=mode, events=events, durability=durability, verifier=verifier)
+
+    merge_journal = MergeJournal(target_dir)
+    merge_journal.write_plan(plan.items())
+    return _copy_with_journal(merge_journal, target_dir, workers, cancel_token, on_progress, mode, events, durability, verifier=verifier)
+
+
+def archive_plan(plan: MergePlan, archive_path: Path, workers: int = DEFAULT_WORKERS, cancel_token: CancelToken | None = None,
+                 on_progress: Callable[[int, int], None] | None = None, events: EventBus | None = None, durability: str = DEFAULT_DURABILITY) -> CopyResult:
+    """
+    계획대로 대상 디렉토리 대신 압축 파일(zip/tar/tar.gz/tar.zst, 확장자로 결정) 하나에 바로 기록합니다.
+    압축 파일은 한 번에 이어서 쓰는 스트림이라 저널/이어서 복사는 지원하지 않습니다.
+    """
+    started_at = time.perf_counter()
+    total = len(plan)
+    done = 0
+
+    def on_file_done(src, new_name, error):
+        nonlocal done
+        done += 1
+        if on_progress:
+            on_progress(done, total)
+
+    writer = ArchiveWriter(archive_path, workers=workers, on_file_done=on_file_done, events=events, durability=durability)
+    result = writer.write_all(plan.items(), cancel_token)
+    if events is not None:
+        events.emit("merge_finished", copied=result.copied, failed=result.failed, cancelled=result.cancelled,
+                    seconds=time.perf_counter() - started_at)
+    return result
+
+
+def merge_to_archive(directories: list[Path], archive_path: Path, template: str, apply_template_to_non_duplicate: bool, file_pattern: str,
+                     scan_index: ScanIndex | None = None, workers: int = DEFAULT_WORKERS, cancel_token: CancelToken | None = None,
+                     on_progress: Callable[[int, int], None] | None = None, exclude: set[Path] | None = None, events: EventBus | None = None,
+                     durability: str = DEFAULT_DURABILITY) -> CopyResult:
+    """merge_files와 같지만 결과를 디렉토리가 아닌 압축 파일 하나로 만듭니다. (중간 복사본 없음)"""
+    plan = apply_template(directories, template, apply_template_to_non_duplicate, file_pattern, scan_index, cancel_token=cancel_token, exclude=exclude, events=events)
+    return archive_plan(plan, archive_path, workers, cancel_token, on_progress, events, durability)
+
+
+def resume_merge(target_dir: Path, workers: int = DEFAULT_WORKERS, cancel_token: CancelToken | None = None,
+                 on_progress: Callable[[int, int], None] | None = None, mode: str = DEFAULT_MODE, events: EventBus | None = None,
+                 durability: str = DEFAULT_DURABILITY, verifier: CopyVerifier | None = None) -> CopyResult:
+    """
+    대상 디렉토리의 저널에 기록된 계획을 그대로 불러와 아직 복사되지 않은 파일만 복사합니다.
+    완료로 기록된 파일도 크기/mtime이 다르면 다시 복사합니다.
+    verifier가 있으면 이번에 복사한 파일만 검증하고, 체크섬 목록의 다른 항목은 그대로 둡니다.
+    """
+    if not MergeJournal.exists(target_dir):
+        raise FileNotFoundError(f"{target_dir}에 이어서 복사할 작업 기록이 없습니다.")
+    return _copy_with_journal(MergeJournal(target_dir), target_dir, workers, cancel_token, on_progress, mode, events, durability, resumed=True,
+                              verifier=verifier)
+
+
+def _copy_with_journal(merge_journal: MergeJournal, target_dir: Path, workers: int, cancel_token: CancelToken | None,
+                       on_progress: Callable[[int, int], None] | None, mode: str, events: EventBus | None, durability: str = DEFAULT_DURABILITY,
+                       resumed: bool = False, verifier: CopyVerifier | None = None) -> CopyResult:
+    started_at = time.perf_counter()
+    entry_ids = {}  # 대상 파일 -> 저널 id
+    pairs = []
+    for entry_id, source, new_name in merge_journal.iter_remaining(target_dir):
+        target_file = target_dir / new_name
+        entry_ids[target_file] = entry_id
+        pairs.append((source, target_file))
+    if resumed and events is not None:
+        # 이어서 복사할 때는 저널에서 불러온 남은 파일이 계획
+        events.emit("plan_built", files=len(pairs), seconds=time.perf_counter() - started_at)
+
+    def on_copied(src, dst):
+        try:
+            merge_journal.mark_done(entry_ids[dst], dst)
+        except OSError:
+            pass  # 기록하지 못한 파일은 다음에 이어서 복사할 때 다시 복사됨
+
+    try:
+        result = _copy_pairs(pairs, workers, cancel_token, on_progress, on_copied, mode, events, durability, verifier)
+    except BaseException:
+        merge_journal.close()
+        raise
+
+    # 모두 복사되었으면 저널은 더 이상 필요 없음
+    if result.errors or result.cancelled:
+        merge_journal.close()
+    else:
+        merge_journal.remove()
+    return result
+
+
+def _copy_pairs(pairs: list[tuple[Path, Path]], workers: int, cancel_token: CancelToken | None,
+                on_progress: Callable[[int, int], None] | None, on_copied: Callable[[Path, Path], None] | None = None,
+                mode: str = DEFAULT_MODE, events: EventBus | None = None, durability: str = DEFAULT_DURABILITY,
+                verifier: CopyVerifier | None = None) -> CopyResult:
+    started_at = time.perf_counter()
+    total = len(pairs)
+    done = 0
+
+    def on_file_done(src, dst, error):
+        nonlocal done
+        done += 1
+        if error is None and on_copied:
+            on_copied(src, dst)
+        if error is None and verifier is not None:
+            # 해시는 프로세스 풀에서 계산되므로 다음 파일 복사와 겹쳐 진행됨
+            verifier.submit(src, dst)
+        if on_progress:
+            on_progress(done, total)
+
+    # 파일 단위 오류는 모아서 마지막에 한 번에 보고
+    if mode == "pipelined":
+        engine = PipelinedCopyEngine(workers, on_file_done, events, durability=durability)
+    else:
+        engine = CopyEngine(workers, on_file_done, mode, events, durability)
+    result = engine.copy_all(pairs, cancel_token)
+    if verifier is not None:
+        # 취소되어도 이미 복사한 파일은 검증을 마쳐 체크섬 목록에 남김 (이어서 복사하면 나머지가 추가됨)
+        result.verification = verifier.finish()
+    if events is not None:
+        events.emit("merge_finished", copied=result.copied, failed=result.failed, cancelled=result.cancelled,
+                    seconds=time.perf_counter() - started_at)
+    return result
@@ -0,0 +1,216 @@
+import sys
+import json
+import time
+import pstats
+import cProfile
+import threading
+import tracemalloc
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, TextIO
+
+# 이벤트 종류와 함께 전달되는 값
+#   scan_started    directory
+#   scan_finished   directory, files, seconds
+#   plan_built      files, seconds
+#   copy_started    source, target
+#   copy_finished   source, target, bytes, seconds, mode
+#   error           source, target, error
+#   merge_finished  copied, failed, cancelled, seconds
+EVENT_KINDS = ("scan_started", "scan_finished", "plan_built", "copy_started", "copy_finished", "error", "merge_finished")
+
+
+class MergeEvent:
+    """병합 파이프라인에서 발생한 이벤트 하나"""
+    __slots__ = ("kind", "time", "data")
+
+    def __init__(self, kind: str, data: dict):
+        self.kind = kind
+        self.time = time.time()
+        self.data = data
+
+    def to_dict(self) -> dict:
+        values = {key: (str(value) if isinstance(value, (Path, BaseException)) else value) for key, value in self.data.items()}
+        return {"event": self.kind, "time": self.time, **values}
+
+
+class EventBus:
+    """
+    이벤트를 구독자에게 전달합니다. 복사 이벤트는 작업 스레드에서 발생하므로 구독자는 스레드 안전해야 합니다.
+    구독자에서 발생한 예외는 병합을 멈추지 않도록 출력만 합니다.
+    """
+
+    def __init__(self):
+        self._subscribers: list[Callable[[MergeEvent], None]] = []
+        self._lock = threading.Lock()
+
+    def subscribe(self, callback: Callable[[MergeEvent], None]) -> Callable[[], None]:
+        """구독자를 등록하고, 구독을 해제하는 함수를 반환"""
+        with self._lock:
+            self._subscribers.append(callback)
+
+        def unsubscribe():
+            with self._lock:
+                if callback in self._subscribers:
+                    self._subscribers.remove(callback)
+
+        return unsubscribe
+
+    def emit(self, kind: str, **data):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        if not subscribers:
+            return
+        event = MergeEvent(kind, data)
+        for callback in subscribers:
+            try:
+                callback(event)
+            except Exception as e:
+                print(f"이벤트 구독자 오류 ({kind}): {e}", file=sys.stderr)
+
+
+class MergeStats:
+    """이벤트를 구독해 처리량(파일/s, MB/s)과 남은 시간을 계산하는 집계기"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started_at = time.monotonic()
+        self.total_files = 0
+        self.files_done = 0
+        self.bytes_done = 0
+        self.errors = 0
+        self.scan_seconds = 0.0
+        self.plan_seconds = 0.0
+        self.copy_seconds = 0.0  # 작업 스레드들의 복사 시간 합계
+
+    def __call__(self, event: MergeEvent):
+        with self._lock:
+            if event.kind == "scan_finished":
+                self.scan_seconds += event.data["seconds"]
+            elif event.kind == "plan_built":
+                self.plan_seconds += event.data["seconds"]
+                self.total_files = event.data["files"]
+                self.started_at = time.monotonic()  # 처리량은 복사가 시작된 뒤부터 계산
+            elif event.kind == "copy_finished":
+                self.files_done += 1
+                self.bytes_done += event.data["bytes"]
+                self.copy_seconds += event.data["seconds"]
+            elif event.kind == "error":
+                self.files_done += 1
+                self.errors += 1
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started_at
+
+    @property
+    def files_per_s(self) -> float:
+        elapsed = self.elapsed
+        return self.files_done / elapsed if elapsed > 0 else 0.0
+
+    @property
+    def mb_per_s(self) -> float:
+        elapsed = self.elapsed
+        return self.bytes_done / 1024 / 1024 / elapsed if elapsed > 0 else 0.0
+
+    @property
+    def eta_seconds(self) -> float | None:
+        """남은 파일 수 / 현재 처리량 (아직 알 수 없으면 None)"""
+        rate = self.files_per_s
+        if not rate or not self.total_files:
+            return None
+        return max(0, self.total_files - self.files_done) / rate
+
+    def format(self) -> str:
+        text = f"{self.files_done}/{self.total_files} 파일, {self.files_per_s:.1f} 파일/s, {self.mb_per_s:.1f} MB/s"
+        eta = self.eta_seconds
+        if eta is not None:
+            minutes, seconds = divmod(int(eta), 60)
+            text += f", 남은 시간 {minutes}분 {seconds}초"
+        if self.errors:
+            text += f", 오류 {self.errors}개"
+        return text
+
+
+class ConsoleReporter:
+    """interval초마다 진행 상황을 한 줄로 출력하는 구독자"""
+
+    def __init__(self, stats: MergeStats, stream: TextIO = sys.stderr, interval: float = 1.0):
+        self.stats = stats
+        self.stream = stream
+        self.interval = interval
+        self._last = 0.0
+
+    def __call__(self, event: MergeEvent):
+        if event.kind == "error":
+            print(f"파일 복사 실패: {event.data['source']} -> {event.data['target']}: {event.data['error']}", file=self.stream)
+        elif event.kind == "plan_built":
+            print(f"계획 완료: 파일 {event.data['files']}개 ({event.data['seconds']:.2f}s)", file=self.stream)
+        elif event.kind == "copy_finished":
+            now = time.monotonic()
+            if now - self._last >= self.interval:
+                self._last = now
+                print(self.stats.format(), file=self.stream)
+
+
+class JsonlEventLog:
+    """모든 이벤트를 JSONL로 기록하는 구독자 (외부 메트릭 수집기로 넘길 때 사용)"""
+
+    def __init__(self, path: Path):
+        self._file = open(path, "a", encoding="utf-8")
+        self._lock = threading.Lock()
+
+    def __call__(self, event: MergeEvent):
+        # ASCII로 기록해 디코딩할 수 없는 파일명(surrogateescape)이 들어 있어도 UTF-8 파일에 쓸 수 있도록 함
+        line = json.dumps(event.to_dict())
+        with self._lock:
+            self._file.write(line + "\n")
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+@contextmanager
+def profile_run(profile_path: Path | None = None, trace_memory: bool = False, stream: TextIO = sys.stderr):
+    """
+    블록 실행을 cProfile/tracemalloc으로 측정합니다. (둘 다 꺼져 있으면 아무것도 하지 않음)
+    cProfile은 호출한 스레드만 측정하므로 블록 안에서 시작된 스레드(복사 작업 스레드 등)마다 따로 프로파일러를 켜고
+    끝날 때 하나로 합칩니다. 블록 전에 이미 실행 중이던 스레드와 프로세스 풀(dedup, 검증)의 작업은 포함되지 않습니다.
+    :param profile_path: cProfile 결과(pstats 형식)를 저장할 경로
+    :param trace_memory: 최대 메모리 사용량과 할당이 많은 위치 상위 10개를 출력
+    """
+    profiler = cProfile.Profile() if profile_path else None
+    thread_profilers = []
+    thread_lock = threading.Lock()
+
+    def profile_thread(frame, event, arg):
+        # 새 스레드의 첫 호출에서 한 번 불림. 이 스레드의 프로파일 함수를 cProfile로 바꿈
+        thread_profiler = cProfile.Profile()
+        with thread_lock:
+            thread_profilers.append(thread_profiler)
+        thread_profiler.enable()
+
+    if trace_memory:
+        tracemalloc.start()
+    if profiler:
+        threading.setprofile(profile_thread)
+        profiler.enable()
+    try:
+        yield
+    finally:
+        if profiler:
+            profiler.disable()
+            threading.setprofile(None)
+            stats = pstats.Stats(profiler)
+            with thread_lock:
+                for thread_profiler in thread_profilers:
+                    stats.add(thread_profiler)
+            stats.dump_stats(str(profile_path))
+        if trace_memory:
+            snapshot = tracemalloc.take_snapshot()
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            print(f"최대 메모리 사용량: {peak / 1024 / 1024:.1f} MB", file=stream)
+            for stat in snapshot.statistics("lineno")[:10]:
+                print(f"  {stat}", file=stream)
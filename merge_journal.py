@@ -0,0 +1,100 @@
+import os
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Iterable, Iterator
+
+from copy_engine import temp_path
+
+JOURNAL_NAME = ".mergefile_journal.sqlite"
+COMMIT_INTERVAL = 256  # 완료 기록을 이 개수만큼 모아서 한 번에 커밋
+
+
+class MergeJournal:
+    """
+    대상 디렉토리에 복사 계획과 파일별 완료 상태를 기록하는 SQLite 저널.
+    복사가 중간에 끊겨도 같은 계획(같은 <RAND>/<TIME> 이름)을 다시 불러와 남은 파일만 복사할 수 있습니다.
+    경로와 파일명은 MergePlan처럼 os.fsencode한 바이트로 저장하므로 디코딩할 수 없는 파일명도 기록할 수 있습니다.
+    """
+
+    def __init__(self, target_dir: Path):
+        self.path = Path(target_dir) / JOURNAL_NAME
+        self._lock = threading.Lock()
+        self._done_rows: list[tuple[int, int, int]] = []  # 아직 커밋하지 않은 (크기, mtime, id)
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            "id INTEGER PRIMARY KEY, source BLOB NOT NULL, new_name BLOB NOT NULL, "
+            "done INTEGER NOT NULL DEFAULT 0, size INTEGER, mtime_ns INTEGER)"
+        )
+
+    @staticmethod
+    def exists(target_dir: Path) -> bool:
+        return (Path(target_dir) / JOURNAL_NAME).exists()
+
+    def write_plan(self, plan: Iterable[tuple[Path, str]]) -> dict[str, int]:
+        """
+        새 계획을 기록합니다. (이전 기록은 지움)
+        :return: 새 파일명 -> 저널 id
+        """
+        ids = {}
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM entries")
+            rows = []
+            for entry_id, (source, new_name) in enumerate(plan):
+                ids[new_name] = entry_id
+                rows.append((entry_id, os.fsencode(source), os.fsencode(new_name)))
+            self._conn.executemany("INSERT INTO entries (id, source, new_name) VALUES (?, ?, ?)", rows)
+        return ids
+
+    def iter_remaining(self, target_dir: Path) -> Iterator[tuple[int, Path, str]]:
+        """
+        아직 복사되지 않은 항목을 (id, 원본, 새 파일명)으로 내보냅니다.
+        완료로 기록됐더라도 대상 파일의 크기/mtime이 기록과 다르면 다시 복사합니다.
+        원본이 없고 대상 파일(또는 그 임시 파일)이 있으면 완료 기록이 커밋되기 전에 끊긴 이동(move)으로 보고 건너뜁니다.
+        """
+        with self._lock:
+            rows = self._conn.execute("SELECT id, source, new_name, done, size, mtime_ns FROM entries ORDER BY id").fetchall()
+        for entry_id, source, new_name, done, size, mtime_ns in rows:
+            source, new_name = os.fsdecode(source), os.fsdecode(new_name)
+            target_file = Path(target_dir) / new_name
+            if not os.path.lexists(source) and not os.path.lexists(target_file):
+                # 원본을 임시 파일로 옮긴 뒤 최종 이름으로 바꾸기 전에 끊긴 이동은 마저 바꿔 줌
+                try:
+                    os.replace(temp_path(target_file), target_file)
+                except OSError:
+                    pass
+            try:
+                stat = os.stat(target_file)
+            except OSError:
+                stat = None
+            if done and stat is not None and stat.st_size == size and stat.st_mtime_ns == mtime_ns:
+                continue
+            # 이동은 대상 파일이 완성된 뒤에 원본을 지우므로, 원본이 사라졌다면 대상 파일이 결과물임
+            if stat is not None and not os.path.lexists(source):
+                continue
+            yield entry_id, Path(source), new_name
+
+    def mark_done(self, entry_id: int, target_file: Path):
+        """복사가 끝난 파일의 크기/mtime을 기록 (COMMIT_INTERVAL개마다 커밋)"""
+        stat = os.stat(target_file)
+        with self._lock:
+            self._done_rows.append((stat.st_size, stat.st_mtime_ns, entry_id))
+            if len(self._done_rows) >= COMMIT_INTERVAL:
+                self._flush()
+
+    def _flush(self):
+        if self._done_rows:
+            with self._conn:
+                self._conn.executemany("UPDATE entries SET done = 1, size = ?, mtime_ns = ? WHERE id = ?", self._done_rows)
+            self._done_rows = []
+
+    def close(self):
+        with self._lock:
+            self._flush()
+        self._conn.close()
+
+    def remove(self):
+        """모든 파일이 복사되었을 때 저널 삭제"""
+        self.close()
+        self.path.unlink(missing_ok=True)
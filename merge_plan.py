@@ -0,0 +1,214 @@
+import os
+import gzip
+from array import array
+from collections.abc import Mapping
+from pathlib import Path
+from typing import Iterable, Iterator
+
+PLAN_MAGIC = "mergefile-plan-1"
+FIELD_SEPARATOR = "\0"  # 파일 이름에 들어갈 수 없는 문자라 구분자로 사용
+LOAD_CHUNK_SIZE = 1024 * 1024  # 계획 파일을 불러올 때 한 번에 압축을 푸는 크기
+
+
+def _iter_fields(f, chunk_size: int = LOAD_CHUNK_SIZE) -> Iterator[bytes]:
+    """압축을 푼 스트림을 조금씩 읽으며 '\0'으로 구분된 필드를 하나씩 내보냄 (파일 전체를 메모리에 올리지 않음)"""
+    separator = FIELD_SEPARATOR.encode()
+    pending = b""
+    while chunk := f.read(chunk_size):
+        buffer = pending + chunk
+        start = 0
+        while (end := buffer.find(separator, start)) != -1:
+            yield buffer[start:end]
+            start = end + 1
+        pending = buffer[start:]
+    yield pending
+
+
+class MergePlan(Mapping):
+    """
+    원본 파일 -> 새 파일명 계획을 적은 메모리로 보관하는 구조.
+    파일마다 Path/str 객체를 두지 않고 디렉토리 경로는 한 번만 저장(인터닝)한 뒤,
+    디렉토리 번호는 정수 배열에, 원본 이름과 새 이름은 하나의 바이트 버퍼에 이어 붙이고 끝 위치만 배열로 기억합니다.
+    새 이름이 원본 이름과 같으면 새 이름은 빈 칸으로 둡니다.
+    dict[Path, str]처럼 items()/keys()/values()/in/[]를 지원하며, 미리보기용으로 인덱스 조회도 제공합니다.
+    """
+
+    def __init__(self):
+        self.directories: list[str] = []  # 디렉토리 번호 -> 경로
+        self._dir_ids: dict[str, int] = {}  # 경로 -> 디렉토리 번호
+        self._dir_labels: list[str] = []  # 디렉토리 번호 -> 미리보기에 표시할 디렉토리 이름
+        self._dir_index = array("I")  # 항목 -> 디렉토리 번호
+        self._names = bytearray()  # 원본 파일 이름을 이어 붙인 버퍼
+        self._name_ends = array("Q")  # 항목 -> 원본 이름의 끝 위치
+        self._new_names = bytearray()  # 새 파일명을 이어 붙인 버퍼 (원본 이름과 같으면 비워 둠)
+        self._new_name_ends = array("Q")  # 항목 -> 새 파일명의 끝 위치
+        self._lookup: dict[tuple[int, bytes], int] | None = None  # (디렉토리 번호, 원본 이름) -> 항목 (처음 조회할 때 만듦)
+
+    @classmethod
+    def from_pairs(cls, pairs: Iterable[tuple[Path, str]]) -> "MergePlan":
+        """(원본 파일, 새 파일명) 쌍으로 계획을 만듭니다. (iter_plan의 결과를 그대로 넘길 수 있음)"""
+        plan = cls()
+        for source, new_name in pairs:
+            plan.append(source, new_name)
+        return plan
+
+    def _intern_directory(self, directory: str) -> int:
+        dir_id = self._dir_ids.get(directory)
+        if dir_id is None:
+            dir_id = len(self.directories)
+            self._dir_ids[directory] = dir_id
+            self.directories.append(directory)
+            self._dir_labels.append(os.path.basename(directory))
+        return dir_id
+
+    def append(self, source: Path, new_name: str):
+        """항목 하나를 추가 (같은 원본을 두 번 추가하지 않는 것은 호출하는 쪽의 책임)"""
+        directory, name = os.path.split(os.fspath(source))
+        self._append(self._intern_directory(directory), name, new_name)
+
+    def _append(self, dir_id: int, name: str, new_name: str):
+        self._dir_index.append(dir_id)
+        self._names += os.fsencode(name)
+        self._name_ends.append(len(self._names))
+        if new_name != name:
+            self._new_names += os.fsencode(new_name)
+        self._new_name_ends.append(len(self._new_names))
+        self._lookup = None
+
+    def _raw_name(self, index: int) -> bytes:
+        return bytes(self._names[self._name_ends[index - 1] if index else 0:self._name_ends[index]])
+
+    def _raw_new_name(self, index: int) -> bytes:
+        return bytes(self._new_names[self._new_name_ends[index - 1] if index else 0:self._new_name_ends[index]])
+
+    # --- 인덱스 조회 (미리보기용) ---
+
+    def original_name(self, index: int) -> str:
+        """index번째 항목의 원본 파일 이름"""
+        return os.fsdecode(self._raw_name(index))
+
+    def source(self, index: int) -> Path:
+        """index번째 항목의 원본 파일 경로"""
+        return Path(self.directories[self._dir_index[index]], self.original_name(index))
+
+    def new_name(self, index: int) -> str:
+        """index번째 항목의 새 파일명"""
+        raw = self._raw_new_name(index)
+        return os.fsdecode(raw) if raw else self.original_name(index)
+
+    def display_name(self, index: int) -> str:
+        """미리보기에 표시할 '부모 디렉토리 이름/파일 이름'"""
+        return f"{self._dir_labels[self._dir_index[index]]}/{self.original_name(index)}"
+
+    # --- dict[Path, str] 호환 ---
+
+    def __len__(self) -> int:
+        return len(self._dir_index)
+
+    def __iter__(self) -> Iterator[Path]:
+        for index in range(len(self)):
+            yield self.source(index)
+
+    def __getitem__(self, source: Path) -> str:
+        return self.new_name(self.index_of(source))
+
+    def __contains__(self, source) -> bool:
+        try:
+            self.index_of(source)
+        except KeyError:
+            return False
+        return True
+
+    def index_of(self, source: Path) -> int:
+        """원본 파일의 항목 번호 (없으면 KeyError)"""
+        if self._lookup is None:
+            self._lookup = {(dir_id, self._raw_name(index)): index for index, dir_id in enumerate(self._dir_index)}
+        try:
+            directory, name = os.path.split(os.fspath(source))
+        except TypeError:
+            raise KeyError(source) from None
+        dir_id = self._dir_ids.get(directory)
+        index = self._lookup.get((dir_id, os.fsencode(name))) if dir_id is not None else None
+        if index is None:
+            raise KeyError(source)
+        return index
+
+    def _iter_raw(self) -> Iterator[tuple[int, bytes, bytes]]:
+        """(디렉토리 번호, 원본 이름, 새 이름 또는 b"")를 순서대로 내보냄"""
+        names, new_names = memoryview(self._names), memoryview(self._new_names)
+        name_start = new_start = 0
+        for dir_id, name_end, new_end in zip(self._dir_index, self._name_ends, self._new_name_ends):
+            yield dir_id, bytes(names[name_start:name_end]), bytes(new_names[new_start:new_end])
+            name_start, new_start = name_end, new_end
+
+    def items(self) -> Iterator[tuple[Path, str]]:
+        # Path/str 객체는 꺼낼 때만 만듦
+        directories = [Path(directory) for directory in self.directories]
+        for dir_id, raw_name, raw_new_name in self._iter_raw():
+            name = os.fsdecode(raw_name)
+            yield directories[dir_id] / name, os.fsdecode(raw_new_name) if raw_new_name else name
+
+    def values(self) -> Iterator[str]:
+        for _, raw_name, raw_new_name in self._iter_raw():
+            yield os.fsdecode(raw_new_name or raw_name)
+
+    def same_sources(self, other: "MergePlan") -> bool:
+        """두 계획의 원본 파일 목록과 순서가 같은지 (새 이름은 비교하지 않음)"""
+        return (len(self) == len(other) and self.directories == other.directories and self._dir_index == other._dir_index
+                and self._name_ends == other._name_ends and self._names == other._names)
+
+    def changed_rows(self, previous: "MergePlan | None") -> list[int] | None:
+        """
+        이전 계획과 비교해 새 파일명이 바뀐 항목 번호 목록을 반환합니다.
+        원본 파일 목록 자체가 다르면 행을 맞춰 볼 수 없으므로 None을 반환합니다.
+        """
+        if previous is None or not self.same_sources(previous):
+            return None
+        if self._new_name_ends == previous._new_name_ends and self._new_names == previous._new_names:
+            return []
+        return [index for index, (old, new) in enumerate(zip(previous._iter_raw(), self._iter_raw())) if old[2] != new[2]]
+
+    # --- 파일 저장/불러오기 ---
+
+    def save(self, path: Path):
+        """
+        gzip으로 압축한 '\\0' 구분 목록으로 저장합니다.
+        디렉토리 경로는 한 번만 쓰고, 새 이름이 원본 이름과 같으면 빈 칸으로 둡니다.
+        """
+        separator = FIELD_SEPARATOR.encode()
+        with gzip.open(path, "wb") as f:
+            f.write(separator.join([PLAN_MAGIC.encode(), str(len(self.directories)).encode(), str(len(self)).encode()]))
+            for directory in self.directories:
+                f.write(separator + os.fsencode(directory))
+            for dir_id, raw_name, raw_new_name in self._iter_raw():
+                f.write(b"%s%d%s%s%s%s" % (separator, dir_id, separator, raw_name, separator, raw_new_name))
+
+    @classmethod
+    def load(cls, path: Path) -> "MergePlan":
+        """
+        save()로 저장한 계획을 불러옵니다.
+        압축을 풀면서 필드를 바로 배열에 옮기므로 메모리는 계획 자체와 읽기 버퍼만큼만 사용합니다.
+        """
+        plan = cls()
+        try:
+            with gzip.open(path, "rb") as f:
+                fields = _iter_fields(f)
+                if next(fields) != PLAN_MAGIC.encode():
+                    raise ValueError(f"{path}는 mergefile 계획 파일이 아닙니다.")
+                try:
+                    dir_count, entry_count = int(next(fields)), int(next(fields))
+                    for _ in range(dir_count):
+                        plan._intern_directory(os.fsdecode(next(fields)))
+                    for _ in range(entry_count):
+                        plan._dir_index.append(int(next(fields)))
+                        plan._names += next(fields)
+                        plan._name_ends.append(len(plan._names))
+                        plan._new_names += next(fields)
+                        plan._new_name_ends.append(len(plan._new_names))
+                except (StopIteration, ValueError, OverflowError) as e:
+                    raise ValueError(f"{path} 계획 파일이 손상되었습니다.") from e
+                if next(fields, None) is not None:
+                    raise ValueError(f"{path} 계획 파일이 손상되었습니다.")
+        except (gzip.BadGzipFile, EOFError) as e:
+            raise ValueError(f"{path}는 mergefile 계획 파일이 아닙니다: {e}") from e
+        return plan
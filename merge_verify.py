@@ -0,0 +1,189 @@
+import os
+import re
+import json
+from pathlib import Path
+from typing import Iterator
+
+from background_task import CancelToken
+from copy_engine import temp_path, commit_file
+from dedup import FileHasher, HashCache, HashJob
+
+MANIFEST_NAME = ".mergefile.sha256"  # 대상 디렉토리에 남기는 체크섬 목록 (숨김 파일이라 와일드카드 패턴에 걸리지 않음)
+SOURCE_PREFIX = "# source: "  # 각 항목 앞에 원본 경로를 적는 주석 (sha256sum -c는 '#' 줄을 무시함)
+
+_MANIFEST_LINE = re.compile(r"^(\\?)([0-9a-fA-F]{64}) [ *](.*)$")
+
+
+def _escape_name(name: str) -> str:
+    """sha256sum과 같이 역슬래시/줄바꿈이 있는 이름은 줄 앞에 '\\'를 붙이고 이스케이프"""
+    if "\\" not in name and "\n" not in name and "\r" not in name:
+        return name
+    return "\\" + name.replace("\\", "\\\\").replace("\n", "\\n").replace("\r", "\\r")
+
+
+def _unescape_name(name: str) -> str:
+    return re.sub(r"\\(.)", lambda m: {"n": "\n", "r": "\r"}.get(m.group(1), m.group(1)), name)
+
+
+def write_manifest(path: Path, entries: Iterator[tuple[str, str, Path | None]]):
+    """
+    (파일명, sha256, 원본) 목록을 sha256sum 형식으로 기록합니다. 파일명은 목록이 있는 디렉토리 기준이므로
+    그 디렉토리에서 'sha256sum -c'로 그대로 확인할 수 있습니다.
+    임시 이름으로 쓴 뒤 바꾸므로 쓰다 만 목록이 남지 않습니다.
+    디코딩할 수 없는 파일명(surrogateescape)은 원래 바이트 그대로 기록합니다. (sha256sum과 같음)
+    """
+    path = Path(path)
+    tmp = temp_path(path)
+    with open(tmp, "w", encoding="utf-8", errors="surrogateescape", newline="\n") as out:
+        for name, sha256, source in entries:
+            if source is not None:
+                out.write(f"{SOURCE_PREFIX}{json.dumps(str(source), ensure_ascii=False)}\n")
+            escaped = _escape_name(name)
+            if escaped.startswith("\\"):
+                out.write(f"\\{sha256}  {escaped[1:]}\n")
+            else:
+                out.write(f"{sha256}  {escaped}\n")
+    commit_file(tmp, path)
+
+
+def read_manifest(path: Path) -> Iterator[tuple[str, str, Path | None]]:
+    """write_manifest로 기록한 목록(또는 일반 sha256sum 출력)을 (새 파일명, sha256, 원본) 순서로 읽음. 원본 주석이 없으면 None"""
+    source = None
+    with open(path, encoding="utf-8", errors="surrogateescape") as f:
+        for line in f:
+            line = line.rstrip("\n")
+            if line.startswith(SOURCE_PREFIX):
+                source = Path(json.loads(line[len(SOURCE_PREFIX):]))
+                continue
+            match = _MANIFEST_LINE.match(line)
+            if match is None:
+                continue  # 다른 주석이나 빈 줄
+            escaped, sha256, name = match.groups()
+            yield (_unescape_name(name) if escaped else name), sha256.lower(), source
+            source = None
+
+
+class VerifyResult:
+    """검증 결과 (일치한 파일 수, 내용이 다른 파일, 해시를 계산하지 못한 파일)"""
+
+    def __init__(self, manifest_path: Path):
+        self.manifest_path = manifest_path
+        self.verified = 0
+        self.target_only = 0  # 원본이 없어(이동 등) 대상만 기록하거나 확인한 파일 수
+        self.checked = 0  # 결과(일치/원본 없음/불일치/오류)가 나온 파일 수. 취소되어 확인하지 못한 파일은 빠짐
+        self.mismatched: list[tuple[Path | None, Path]] = []
+        self.errors: list[tuple[Path, Exception]] = []
+        self.cancelled = False
+
+    @property
+    def failed(self) -> int:
+        return len(self.mismatched) + len(self.errors)
+
+
+class CopyVerifier:
+    """
+    복사가 끝난 파일부터 원본과 대상의 sha256을 프로세스 풀에서 계산해, 복사와 검증이 동시에 진행되도록 합니다.
+    모든 복사가 끝나면 finish()가 남은 해시를 기다려 비교하고 체크섬 목록(sha256sum 형식)을 기록합니다.
+    원본 해시는 캐시를 사용하고, 대상은 방금 쓴 내용을 항상 다시 읽습니다. (계산한 해시는 다음 verify_manifest를 위해 캐시에 저장)
+    submit()은 복사 작업 스레드에서 호출되므로 CopyEngine의 on_file_done처럼 한 번에 하나씩 호출되어야 합니다.
+    """
+
+    def __init__(self, manifest_path: Path, cache: HashCache | None = None, processes: int | None = None):
+        self.manifest_path = Path(manifest_path)
+        self._manifest_dir = os.path.abspath(self.manifest_path.parent)
+        self._hasher = FileHasher(cache, processes)
+        self._entries: list[tuple[Path, Path, HashJob | None, HashJob]] = []
+
+    def _entry_name(self, dst: Path) -> str:
+        """목록에 적을 대상 파일 이름 (verify_manifest와 sha256sum -c가 찾을 수 있도록 목록이 있는 디렉토리 기준)"""
+        try:
+            return Path(os.path.relpath(os.path.abspath(dst), self._manifest_dir)).as_posix()
+        except ValueError:
+            return os.path.abspath(dst)  # Windows에서 드라이브가 다르면 상대 경로를 만들 수 없음
+
+    def submit(self, src: Path, dst: Path):
+        """복사를 마친 파일 하나의 검증을 시작 (move로 원본이 없으면 대상 해시만 기록)"""
+        src_job = self._hasher.request(src) if os.path.lexists(src) else None
+        self._entries.append((src, dst, src_job, self._hasher.request(dst, use_cache=False)))
+
+    def finish(self, cancel_token: CancelToken | None = None) -> VerifyResult:
+        """
+        남은 해시를 기다려 원본과 대상을 비교하고 체크섬 목록을 기록합니다.
+        목록이 이미 있으면(이어서 복사한 경우 등) 이번에 복사하지 않은 파일의 항목은 그대로 둡니다.
+        """
+        result = VerifyResult(self.manifest_path)
+        result.cancelled = not self._hasher.wait_all(cancel_token)
+
+        manifest: dict[str, tuple[str, Path | None]] = {}
+        if self.manifest_path.exists():
+            for name, sha256, source in read_manifest(self.manifest_path):
+                manifest[name] = (sha256, source)
+
+        for src, dst, src_job, dst_job in self._entries:
+            if dst_job.sha256 is None and dst_job.error is None:
+                continue  # 취소되어 계산하지 못함
+            if src_job is not None and src_job.sha256 is None and src_job.error is None:
+                continue
+            result.checked += 1
+            if dst_job.error is not None:
+                result.errors.append((dst, dst_job.error))
+                continue
+            # 다른 작업 디렉토리에서 다시 확인해도 원본을 찾을 수 있도록 절대 경로로 기록
+            source = src.resolve()
+            if src_job is None:
+                result.target_only += 1
+                manifest[self._entry_name(dst)] = (dst_job.sha256, source)
+                continue
+            if src_job.error is not None:
+                result.errors.append((src, src_job.error))
+                continue
+            if src_job.sha256 != dst_job.sha256:
+                result.mismatched.append((src, dst))
+            else:
+                result.verified += 1
+            # 목록에는 원본의 해시를 기록하므로 내용이 다른 대상은 sha256sum -c에서도 실패로 나옴
+            manifest[self._entry_name(dst)] = (src_job.sha256, source)
+        self._entries = []
+
+        write_manifest(self.manifest_path, ((name, sha256, source) for name, (sha256, source) in sorted(manifest.items())))
+        return result
+
+
+def verify_manifest(manifest_path: Path, cache: HashCache | None = None, processes: int | None = None, check_sources: bool = True,
+                    cancel_token: CancelToken | None = None) -> VerifyResult:
+    """
+    체크섬 목록대로 대상 파일(과 원본 주석이 있으면 원본)을 다시 확인합니다.
+    cache를 넘기면 크기와 mtime이 그대로인 파일은 다시 읽지 않고 저장된 해시로 비교합니다.
+    """
+    manifest_path = Path(manifest_path)
+    result = VerifyResult(manifest_path)
+    hasher = FileHasher(cache, processes)
+    entries = []
+    for name, sha256, source in read_manifest(manifest_path):
+        if cancel_token is not None and cancel_token.cancelled:
+            result.cancelled = True
+            break
+        target = manifest_path.parent / name
+        src_job = hasher.request(source) if check_sources and source is not None and os.path.lexists(source) else None
+        entries.append((source, target, sha256, src_job, hasher.request(target)))
+    if not hasher.wait_all(cancel_token):
+        result.cancelled = True
+
+    for source, target, sha256, src_job, dst_job in entries:
+        if dst_job.error is not None:
+            result.checked += 1
+            result.errors.append((target, dst_job.error))
+            continue
+        if dst_job.sha256 is None:
+            continue  # 취소되어 계산하지 못함
+        result.checked += 1
+        if src_job is None:
+            result.target_only += 1
+        elif src_job.error is not None:
+            result.errors.append((source, src_job.error))
+            continue
+        if dst_job.sha256 != sha256 or (src_job is not None and src_job.sha256 is not None and src_job.sha256 != sha256):
+            result.mismatched.append((source, target))
+        else:
+            result.verified += 1
+    return result
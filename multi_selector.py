@@ -1,7 +1,44 @@
+import os
+import time
 import tkinter as tk
 from tkinter import filedialog
 from pathlib import Path
 
+from background_task import BackgroundTask, CancelToken, Debouncer
+
+SCAN_BATCH_SIZE = 512  # 작업 스레드가 한 번에 넘기는 디렉토리 이름 수
+SCAN_BATCH_SECONDS = 0.1  # 배치가 덜 찼어도 이 시간이 지나면 넘김 (느린 네트워크 드라이브에서도 바로 보이도록)
+FILTER_DELAY_MS = 150  # 필터 입력이 멈춘 뒤 목록을 다시 그리기까지의 지연
+
+
+def scan_subdirectory_names(parent_dir: Path, token: CancelToken, report):
+    """
+    parent_dir 바로 아래의 디렉토리 이름을 os.scandir로 읽어 배치 단위로 report에 넘깁니다.
+    DirEntry.is_dir()는 scandir가 이미 알려준 파일 종류(d_type)를 사용하므로 항목마다 stat을 호출하지 않습니다.
+    :return: 찾은 디렉토리 수
+    """
+    batch = []
+    count = 0
+    last_report = time.monotonic()
+    with os.scandir(parent_dir) as entries:
+        for entry in entries:
+            token.check()
+            try:
+                if not entry.is_dir():
+                    continue
+            except OSError:
+                continue
+            batch.append(entry.name)
+            count += 1
+            if len(batch) >= SCAN_BATCH_SIZE or time.monotonic() - last_report >= SCAN_BATCH_SECONDS:
+                report(batch)
+                batch = []
+                last_report = time.monotonic()
+    if batch:
+        report(batch)
+    return count
+
+
 class DirectorySelector(tk.Toplevel):
     def __init__(self, master=None, title="Select Directories", initialdir=None):
         super().__init__(master)
@@ -10,6 +47,11 @@ class DirectorySelector(tk.Toplevel):
 
         self.selected_directories = []
         self.selected_parent_dir = None  # 선택된 부모 디렉토리 저장
+        self.all_names: list[str] = []  # 지금까지 읽은 하위 디렉토리 이름 (필터와 무관)
+        self.selected_names: set[str] = set()  # 필터로 가려진 항목도 선택 상태를 유지하기 위해 이름으로 보관
+        self.visible_names: list[str] = []  # Listbox에 표시된 이름 (Listbox에서 다시 읽지 않도록 같은 순서로 보관)
+        self.visible_selection: set[int] = set()  # selected_names에 마지막으로 반영한 Listbox 선택 인덱스
+        self.scan_task = None
 
         # 항상 최상위로 표시하도록 설정
         self.attributes("-topmost", 1)
@@ -22,6 +64,13 @@ class DirectorySelector(tk.Toplevel):
         self.parent_dir_label = tk.Label(self, text="No parent directory selected", anchor="w")
         self.parent_dir_label.pack(fill="both", padx=10)
 
+        # 입력하는 대로 목록을 걸러내는 필터 (대소문자 구분 없이 이름에 포함된 항목만 표시)
+        self.filter_var = tk.StringVar()
+        self.filter_entry = tk.Entry(self, textvariable=self.filter_var)
+        self.filter_entry.pack(fill="x", padx=10, pady=(5, 0))
+        self.filter_debouncer = Debouncer(self, FILTER_DELAY_MS, self.apply_filter)
+        self.filter_var.trace_add("write", lambda *args: self.filter_debouncer.trigger())
+
         # Listbox와 Scrollbar 설정 (Listbox와 Scrollbar를 Frame 내부에 배치)
         self.listbox_frame = tk.Frame(self)
         self.listbox_frame.pack(padx=10, pady=10, fill="both", expand=True)
@@ -29,11 +78,17 @@ class DirectorySelector(tk.Toplevel):
         self.scrollbar = tk.Scrollbar(self.listbox_frame, orient="vertical")
         self.scrollbar.pack(side=tk.RIGHT, fill="y")
 
-        self.listbox = tk.Listbox(self.listbox_frame, selectmode=tk.EXTENDED, height=10, yscrollcommand=self.scrollbar.set)
+        # exportselection=False: 필터 입력란에서 글자를 선택해도 목록의 선택이 풀리지 않도록 함
+        self.listbox = tk.Listbox(self.listbox_frame, selectmode=tk.EXTENDED, height=10, exportselection=False,
+                                  yscrollcommand=self.scrollbar.set)
         self.listbox.pack(side=tk.LEFT, fill="both", expand=True)
 
         # 스크롤바와 Listbox 연결
         self.scrollbar.config(command=self.listbox.yview)
+        self.listbox.bind("<<ListboxSelect>>", lambda e: self.remember_selection())
+
+        self.status_label = tk.Label(self, text="", anchor="w")
+        self.status_label.pack(fill="x", padx=10)
 
         self.confirm_button = tk.Button(self, text="Confirm", command=self.confirm_selection)
         self.confirm_button.pack(side=tk.RIGHT, padx=5, pady=10)
@@ -41,7 +96,8 @@ class DirectorySelector(tk.Toplevel):
         self.cancel_button = tk.Button(self, text="Cancel", command=self.cancel_selection)
         self.cancel_button.pack(side=tk.LEFT, padx=5, pady=10)
 
-        self.geometry("400x300")
+        self.protocol("WM_DELETE_WINDOW", self.cancel_selection)
+        self.geometry("400x350")
 
     def select_parent_directory(self):
         """부모 디렉토리를 선택하고, 그 하위 디렉토리들을 Listbox에 추가"""
@@ -50,27 +106,100 @@ class DirectorySelector(tk.Toplevel):
             self.selected_parent_dir = Path(selected_dir)  # 선택된 부모 디렉토리 저장
             self.initialdir = self.selected_parent_dir  # 이후 경로는 선택한 디렉토리로 설정
             self.parent_dir_label.config(text=f"Parent Directory: {self.selected_parent_dir.name}")  # 부모 디렉터리 이름 표시
-            self.listbox.delete(0, tk.END)  # 이전 목록을 지우고
             self.add_subdirectories(self.selected_parent_dir)  # 선택한 부모 디렉토리로 하위 디렉토리 목록 갱신
 
     def add_subdirectories(self, parent_dir):
-        """선택한 부모 디렉토리의 하위 디렉토리들을 Listbox에 추가 (이름만 표시)"""
-        try:
-            subdirectories = [d for d in parent_dir.iterdir() if d.is_dir()]
-            for subdir in subdirectories:
-                self.listbox.insert(tk.END, subdir.name)  # 디렉토리 이름만 Listbox에 추가
-        except Exception as e:
-            print(f"Error adding subdirectories: {e}")
+        """
+        선택한 부모 디렉토리의 하위 디렉토리들을 작업 스레드에서 읽어 Listbox에 조금씩 추가 (이름만 표시)
+        목록을 읽는 동안에도 스크롤, 선택, 필터 입력을 할 수 있습니다.
+        """
+        self.stop_scan()
+        self.all_names = []
+        self.selected_names = set()
+        self.visible_names = []
+        self.visible_selection = set()
+        self.listbox.delete(0, tk.END)  # 이전 목록을 지우고
+        self.status_label.config(text="Loading...")
+
+        # 창이 먼저 닫혀도 큐 확인이 계속될 수 있도록 after()는 부모 창에서 예약
+        self.scan_task = BackgroundTask(
+            self.master,
+            lambda token, report: scan_subdirectory_names(parent_dir, token, report),
+            on_done=self.on_scan_done,
+            on_error=self.on_scan_error,
+            on_progress=self.on_scan_progress,
+        ).start()
+
+    def stop_scan(self):
+        if self.scan_task is not None:
+            self.scan_task.cancel()
+            self.scan_task = None
+
+    def on_scan_progress(self, batches: list[list[str]]):
+        """새로 읽은 이름을 보관하고, 현재 필터에 맞는 것만 한 번에 추가"""
+        matcher = self.filter_matcher()
+        visible = []
+        for names in batches:
+            self.all_names.extend(names)
+            visible.extend(name for name in names if matcher(name))
+        if visible:
+            self.visible_names.extend(visible)
+            self.listbox.insert(tk.END, *visible)
+        self.status_label.config(text=f"Loading... {len(self.all_names)} directories")
+
+    def on_scan_done(self, count: int):
+        self.scan_task = None
+        self.status_label.config(text=f"{count} directories")
+
+    def on_scan_error(self, error: BaseException):
+        self.scan_task = None
+        print(f"Error adding subdirectories: {error}")
+        self.status_label.config(text=f"Error: {error}")
+
+    def filter_matcher(self):
+        text = self.filter_var.get().strip().casefold()
+        if not text:
+            return lambda name: True
+        return lambda name: text in name.casefold()
+
+    def remember_selection(self):
+        """
+        보이는 항목의 선택 상태를 이름 집합에 반영 (보이지 않는 항목의 선택은 그대로 둠)
+        클릭할 때마다 호출되므로 전체 목록이 아니라 이전 선택과 달라진 인덱스만 반영합니다.
+        """
+        selected = set(self.listbox.curselection())
+        for index in selected - self.visible_selection:
+            self.selected_names.add(self.visible_names[index])
+        for index in self.visible_selection - selected:
+            self.selected_names.discard(self.visible_names[index])
+        self.visible_selection = selected
+
+    def apply_filter(self):
+        """필터에 맞는 항목으로 목록을 다시 만들고 이전 선택을 복원"""
+        self.remember_selection()
+        matcher = self.filter_matcher()
+        self.visible_names = [name for name in self.all_names if matcher(name)]
+        self.visible_selection = set()
+        self.listbox.delete(0, tk.END)
+        if self.visible_names:
+            self.listbox.insert(tk.END, *self.visible_names)
+        for index, name in enumerate(self.visible_names):
+            if name in self.selected_names:
+                self.listbox.selection_set(index)
+                self.visible_selection.add(index)
 
     def confirm_selection(self):
         """확인 버튼 클릭 시, 선택된 디렉토리들을 반환"""
         if self.selected_parent_dir:
-            selected_indices = self.listbox.curselection()
-            self.selected_directories = [self.selected_parent_dir / self.listbox.get(i) for i in selected_indices]  # 선택된 하위 디렉토리 경로 저장
+            self.stop_scan()
+            self.remember_selection()
+            # 필터로 가려진 항목도 포함해 읽은 순서대로 선택된 하위 디렉토리 경로 저장
+            self.selected_directories = [self.selected_parent_dir / name for name in self.all_names if name in self.selected_names]
             self.destroy()
 
     def cancel_selection(self):
         """취소 버튼 클릭 시 빈 리스트 반환"""
+        self.stop_scan()
         self.selected_directories = []
         self.destroy()
 
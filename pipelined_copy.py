@@ -0,0 +1,315 @@
+import os
+import time
+import shutil
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from pathlib import Path
+from typing import Callable, Iterable, Iterator
+
+from background_task import CancelToken
+from copy_engine import CopyEngine, CopyResult, DEFAULT_WORKERS, DEFAULT_DURABILITY, copy_file, temp_path, commit_file, discard_temp
+from merge_events import EventBus
+
+BUFFER_SIZE = 4 * 1024 * 1024  # 재사용하는 버퍼 하나의 크기 (큰 파일은 이 단위로 읽고 씀)
+MAX_INFLIGHT_BYTES = 64 * 1024 * 1024  # 동시에 메모리에 올라와 있을 수 있는 데이터의 상한
+SMALL_FILE_SIZE = 256 * 1024  # 이 크기 이하의 파일은 여러 개를 버퍼 하나에 모아 한 번에 읽고 씀
+BATCH_FILES = 16  # 작은 파일 묶음 하나에 넣는 최대 파일 수 (묶음 단위로 읽기와 쓰기가 겹침)
+GROUP_SIZE = 64  # 작업 하나가 맡는 파일 수 (stat을 한 번의 스레드 전환으로 처리)
+
+
+class BufferPool:
+    """
+    bytearray를 돌려 쓰는 버퍼 풀. 버퍼는 필요할 때 하나씩 만들되 count개를 넘지 않으므로
+    count x size가 곧 메모리 상한이 됩니다.
+    """
+
+    def __init__(self, count: int, size: int):
+        self.size = size
+        self._available = count  # 아직 만들지 않은 버퍼 수
+        self._free: asyncio.Queue[bytearray] = asyncio.Queue()
+
+    async def acquire(self) -> bytearray:
+        """빈 버퍼를 가져감 (상한에 도달했으면 다른 작업이 돌려줄 때까지 기다림)"""
+        if self._free.empty() and self._available > 0:
+            self._available -= 1
+            return bytearray(self.size)
+        return await self._free.get()
+
+    def release(self, buffer: bytearray):
+        self._free.put_nowait(buffer)
+
+
+def _write_all(f, view: memoryview):
+    """버퍼링 없이 연 파일은 일부만 쓸 수 있으므로 다 쓸 때까지 반복"""
+    while view:
+        written = f.write(view)
+        view = view[written:]
+
+
+def _stat_sizes(group: list[tuple[Path, Path]]) -> list[int | Exception]:
+    sizes = []
+    for src, _ in group:
+        try:
+            sizes.append(os.stat(src).st_size)
+        except OSError as e:
+            sizes.append(e)
+    return sizes
+
+
+def _read_small_files(batch: list[tuple[Path, Path, int, int]], buffer: bytearray) -> list[int | Exception | None]:
+    """
+    작은 파일들을 버퍼의 각자 자리(offset)에 읽어 둡니다.
+    :return: 파일별 읽은 바이트 수, 오류, 또는 stat 이후 파일이 커져 자리에 들어가지 않으면 None
+    """
+    view = memoryview(buffer)
+    outcomes = []
+    for src, _, size, offset in batch:
+        try:
+            with open(src, "rb", buffering=0) as f:
+                length = 0
+                while length < size:
+                    n = f.readinto(view[offset + length:offset + size])
+                    if not n:
+                        break
+                    length += n
+                outcomes.append(None if f.read(1) else length)
+        except OSError as e:
+            outcomes.append(e)
+    return outcomes
+
+
+def _write_small_files(batch: list[tuple[Path, Path, int, int]], outcomes: list[int | Exception | None], buffer: bytearray,
+                       durability: str) -> list[tuple[int, Exception | None]]:
+    """
+    읽어 둔 작은 파일들을 임시 이름으로 쓰고 최종 이름으로 바꿉니다. (batched이면 CopyEngine이 fsync한 뒤 바꾸도록 임시 이름으로 둠)
+    :return: 파일별 (크기, 오류)
+    """
+    view = memoryview(buffer)
+    written = []
+    for (src, dst, _, offset), outcome in zip(batch, outcomes):
+        if isinstance(outcome, Exception):
+            written.append((0, outcome))
+            continue
+        tmp = temp_path(dst)
+        try:
+            if outcome is None:
+                # 읽는 사이에 파일이 커졌으면 일반 복사로 처리
+                size = copy_file(src, tmp)
+            else:
+                with open(tmp, "wb", buffering=0) as f:
+                    _write_all(f, view[offset:offset + outcome])
+                shutil.copymode(src, tmp)
+                size = outcome
+            if durability != "batched":
+                commit_file(tmp, dst, durability)
+            written.append((size, None))
+        except OSError as e:
+            discard_temp(src, tmp)
+            written.append((0, e))
+    return written
+
+
+def _open_pair(src: Path, tmp: Path):
+    fsrc = open(src, "rb", buffering=0)
+    try:
+        return fsrc, open(tmp, "wb", buffering=0)
+    except BaseException:
+        fsrc.close()
+        raise
+
+
+def _close_pair(fsrc, fdst, src: Path, tmp: Path, dst: Path, durability: str, succeeded: bool):
+    """
+    파일을 닫고, 성공했으면 권한을 복사해 최종 이름으로 바꾸고, 실패했으면 임시 파일을 지움
+    batched이면 CopyEngine이 fsync한 뒤 바꾸도록 임시 이름으로 둠
+    """
+    try:
+        fdst.close()
+    finally:
+        fsrc.close()
+    if not succeeded:
+        discard_temp(src, tmp)
+        return
+    try:
+        shutil.copymode(src, tmp)
+        if durability != "batched":
+            commit_file(tmp, dst, durability)
+    except BaseException:
+        discard_temp(src, tmp)
+        raise
+
+
+class PipelinedCopyEngine(CopyEngine):
+    """
+    지연이 큰 대상(SMB/NFS)을 위해 asyncio 이벤트 루프가 스레드 풀의 읽기/쓰기를 겹쳐 진행시키는 복사 엔진.
+    - 큰 파일은 BUFFER_SIZE 단위로 읽으며, 다음 조각을 읽는 동안 이전 조각을 씁니다.
+    - 작은 파일은 여러 개를 버퍼 하나에 모아 한 번의 스레드 작업으로 읽고, 한 번의 스레드 작업으로 씁니다.
+    - 모든 데이터는 BufferPool의 버퍼를 거치므로 동시에 쓰는 메모리는 max_inflight_bytes를 넘지 않습니다.
+    결과, 이벤트, on_file_done은 CopyEngine과 같고 by_mode에는 "pipelined"로 기록됩니다.
+    """
+
+    def __init__(self, workers: int = DEFAULT_WORKERS, on_file_done: Callable[[Path, Path, Exception | None], None] | None = None,
+                 events: EventBus | None = None, buffer_size: int = BUFFER_SIZE, max_inflight_bytes: int = MAX_INFLIGHT_BYTES,
+                 small_file_size: int = SMALL_FILE_SIZE, durability: str = DEFAULT_DURABILITY):
+        super().__init__(workers, on_file_done, "pipelined", events, durability)
+        self.buffer_size = buffer_size
+        self.buffer_count = max(2, max_inflight_bytes // buffer_size)
+        self.small_file_size = min(small_file_size, buffer_size)
+
+    def copy_all(self, pairs: Iterable[tuple[Path, Path]], cancel_token: CancelToken | None = None) -> CopyResult:
+        """(원본, 대상) 쌍을 모두 복사. 취소되면 진행 중인 파일만 마치고 result.cancelled를 설정합니다."""
+        result = CopyResult()
+        asyncio.run(self._copy_all(iter(pairs), result, cancel_token))
+        return result
+
+    async def _copy_all(self, pairs: Iterator[tuple[Path, Path]], result: CopyResult, cancel_token: CancelToken | None):
+        loop = asyncio.get_running_loop()
+        pool = BufferPool(self.buffer_count, self.buffer_size)
+        # 파일 열기/닫기 지연이 겹치도록 읽기와 쓰기 스레드를 따로 둘 수 있게 작업 수의 두 배
+        with ThreadPoolExecutor(max_workers=self.workers * 2) as executor:
+            def run(func, *args):
+                return loop.run_in_executor(executor, func, *args)
+
+            slots = asyncio.Semaphore(self.workers)  # 동시에 진행하는 파일 묶음 수 (묶음마다 읽기 하나, 쓰기 하나)
+            tasks = set()
+            while True:
+                if cancel_token is not None and cancel_token.cancelled:
+                    result.cancelled = True
+                    break
+                group = list(islice(pairs, GROUP_SIZE))
+                if not group:
+                    break
+                await slots.acquire()
+                task = asyncio.create_task(self._copy_group(group, pool, run, result, cancel_token))
+                tasks.add(task)
+                task.add_done_callback(lambda t: (tasks.discard(t), slots.release()))
+            if tasks:
+                await asyncio.gather(*tasks)
+            await run(self.flush, result)
+
+    def _check_cancelled(self, result: CopyResult, cancel_token: CancelToken | None) -> bool:
+        if cancel_token is not None and cancel_token.cancelled:
+            result.cancelled = True
+            return True
+        return False
+
+    async def _copy_group(self, group: list[tuple[Path, Path]], pool: BufferPool, run, result: CopyResult, cancel_token: CancelToken | None):
+        sizes = await run(_stat_sizes, group)
+
+        # 작은 파일은 버퍼 하나에 들어가는 만큼씩 묶고, 큰 파일은 따로 처리
+        batches, batch, used = [], [], 0
+        large = []
+        for (src, dst), size in zip(group, sizes):
+            if isinstance(size, Exception):
+                self._record(src, dst, result, 0, self.mode, size, time.perf_counter())
+            elif size <= self.small_file_size:
+                if used + size > pool.size or len(batch) >= BATCH_FILES:
+                    batches.append(batch)
+                    batch, used = [], 0
+                batch.append((src, dst, size, used))
+                used += size
+            else:
+                large.append((src, dst))
+        if batch:
+            batches.append(batch)
+
+        # 다음 묶음을 읽는 동안 이전 묶음을 씀
+        writing = None
+        try:
+            for batch in batches:
+                if self._check_cancelled(result, cancel_token):
+                    return
+                batch_write = await self._read_small_batch(batch, pool, run)
+                if writing is not None:
+                    await writing
+                writing = asyncio.ensure_future(batch_write(result))
+            if writing is not None:
+                await writing
+                writing = None
+        finally:
+            if writing is not None:
+                await writing
+
+        for src, dst in large:
+            if self._check_cancelled(result, cancel_token):
+                return
+            await self._copy_large(src, dst, pool, run, result)
+
+    async def _read_small_batch(self, batch: list[tuple[Path, Path, int, int]], pool: BufferPool, run):
+        """작은 파일 묶음을 버퍼 하나에 읽고, 그 버퍼를 대상에 쓰는 코루틴 함수를 반환"""
+        if self.events:
+            for src, dst, _, _ in batch:
+                self.events.emit("copy_started", source=src, target=dst)
+        buffer = await pool.acquire()
+        started_at = time.perf_counter()
+        try:
+            outcomes = await run(_read_small_files, batch, buffer)
+        except BaseException:
+            pool.release(buffer)
+            raise
+
+        async def write(result: CopyResult):
+            try:
+                written = await run(_write_small_files, batch, outcomes, buffer, self.durability)
+            finally:
+                pool.release(buffer)
+            # batched이면 fsync가 일어날 수 있으므로 이벤트 루프가 아닌 스레드에서 완료 처리
+            await run(self._complete_many, result, [(src, dst, size, error, started_at) for (src, dst, _, _), (size, error) in zip(batch, written)])
+
+        return write
+
+    async def _copy_large(self, src: Path, dst: Path, pool: BufferPool, run, result: CopyResult):
+        if self.events:
+            self.events.emit("copy_started", source=src, target=dst)
+        started_at = time.perf_counter()
+        tmp = temp_path(dst)
+        try:
+            fsrc, fdst = await run(_open_pair, src, tmp)
+        except OSError as e:
+            self._record(src, dst, result, 0, self.mode, e, started_at)
+            return
+
+        async def write_chunk(buffer: bytearray, length: int):
+            try:
+                await run(_write_all, fdst, memoryview(buffer)[:length])
+            finally:
+                pool.release(buffer)
+
+        total = 0
+        error = None
+        writing = None  # 진행 중인 이전 조각의 쓰기
+        try:
+            while True:
+                buffer = await pool.acquire()
+                try:
+                    length = await run(fsrc.readinto, buffer)
+                except BaseException:
+                    pool.release(buffer)
+                    raise
+                if writing is not None:
+                    await writing
+                    writing = None
+                if not length:
+                    pool.release(buffer)
+                    break
+                # 이 조각을 쓰는 동안 다음 조각을 읽음
+                writing = asyncio.ensure_future(write_chunk(buffer, length))
+                total += length
+        except OSError as e:
+            error = e
+        finally:
+            if writing is not None:
+                try:
+                    await writing
+                except OSError as e:
+                    error = error or e
+            try:
+                await run(_close_pair, fsrc, fdst, src, tmp, dst, self.durability, error is None)
+            except OSError as e:
+                error = error or e
+        await run(self._complete_many, result, [(src, dst, total, error, started_at)])
+
+    def _complete_many(self, result: CopyResult, entries: list[tuple[Path, Path, int, Exception | None, float]]):
+        for src, dst, size, error, started_at in entries:
+            self._complete(src, dst, result, size, self.mode, error, started_at)
@@ -0,0 +1,65 @@
+import random
+from datetime import datetime
+from pathlib import Path
+
+from background_task import CancelToken
+from merge_core import apply_template
+from merge_plan import MergePlan
+from scan_index import ScanIndex, ScanSnapshot
+
+PREVIEW_SEED = 0  # 미리보기의 <RAND>를 매번 같게 만들어 템플릿의 다른 부분만 바뀌었을 때 행이 그대로 남도록 함
+
+
+class PreviewUpdate:
+    """
+    미리보기를 한 번 계산한 결과.
+    changed는 이전 미리보기와 비교해 새 이름이 바뀐 행 번호 목록이며, 원본 파일 목록이 달라졌으면 None (전체를 다시 그려야 함)
+    """
+    __slots__ = ("key", "snapshot", "plan", "now", "changed")
+
+    def __init__(self, key: tuple, snapshot: ScanSnapshot, plan: MergePlan, now: datetime, changed: list[int] | None):
+        self.key = key
+        self.snapshot = snapshot
+        self.plan = plan
+        self.now = now
+        self.changed = changed
+
+
+class PlanPreview:
+    """
+    마지막 미리보기의 스캔 결과와 계획을 기억해 두는 미리보기 엔진 (tkinter 없음).
+    소스 디렉토리와 패턴이 그대로면 디렉토리를 다시 읽지 않고 스냅샷으로 계획만 다시 세우며,
+    새 계획을 이전 계획과 비교해 바뀐 행만 알려줍니다.
+    compute()는 작업 스레드에서, accept()/reset()은 메인 스레드에서 호출합니다.
+    """
+
+    def __init__(self, scan_index: ScanIndex):
+        self.scan_index = scan_index
+        # (패턴과 디렉토리 키, 스냅샷, 계획, <DATE>/<TIME> 기준 시각)을 한 번에 바꿔 작업 스레드가 항상 일관된 상태를 읽도록 함
+        self._state: tuple[tuple | None, ScanSnapshot | None, MergePlan | None, datetime | None] = (None, None, None, None)
+
+    @property
+    def plan(self) -> MergePlan | None:
+        return self._state[2]
+
+    def compute(self, directories: list[Path], template: str, apply_template_to_non_duplicate: bool, file_pattern: str,
+                cancel_token: CancelToken | None = None) -> PreviewUpdate:
+        """새 계획을 세우고 이전 계획과 비교합니다. (상태는 accept()를 호출해야 바뀜)"""
+        key_before, snapshot, previous, now = self._state
+        key = (tuple(sorted(set(directories))), file_pattern)
+        if key != key_before or snapshot is None:
+            snapshot = ScanSnapshot.capture(self.scan_index, directories, file_pattern, cancel_token)
+            previous = None
+        # <TIME>이 초마다 바뀌어 모든 행이 바뀌지 않도록 첫 미리보기 시각을 계속 사용
+        now = now or datetime.now()
+        plan = apply_template(directories, template, apply_template_to_non_duplicate, file_pattern, snapshot, now, cancel_token,
+                              rng=random.Random(PREVIEW_SEED))
+        return PreviewUpdate(key, snapshot, plan, now, plan.changed_rows(previous))
+
+    def accept(self, update: PreviewUpdate):
+        """화면에 반영한 결과를 다음 비교의 기준으로 삼음"""
+        self._state = (update.key, update.snapshot, update.plan, update.now)
+
+    def reset(self):
+        """다음 미리보기에서 디렉토리를 다시 읽고 전체를 다시 그리도록 함"""
+        self._state = (None, None, None, None)
@@ -0,0 +1,249 @@
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from pathlib import Path
+from typing import Iterator
+
+PATTERN_SEPARATOR = ";"  # 여러 패턴 구분자 (예: *.jpg;*.png)
+EXCLUDE_PREFIX = "!"  # 제외 패턴 접두사 (예: !**/thumbs/**)
+DEFAULT_WALK_WORKERS = 8  # 하위 트리를 동시에 읽는 스레드 수
+
+_IGNORE_CASE = os.path.normcase("A") == "a"  # Windows처럼 대소문자를 구분하지 않는 경우
+
+
+def _translate_segment(segment: str) -> str:
+    """경로 한 단계의 와일드카드를 '/'를 넘지 않는 정규식으로 변환"""
+    regex = []
+    i = 0
+    while i < len(segment):
+        char = segment[i]
+        i += 1
+        if char == "*":
+            regex.append("[^/]*")
+        elif char == "?":
+            regex.append("[^/]")
+        elif char == "[":
+            # fnmatch와 같은 순서: '!' 다음, 맨 앞의 ']'는 닫는 괄호가 아니라 문자로 취급
+            end = i
+            if end < len(segment) and segment[end] == "!":
+                end += 1
+            if end < len(segment) and segment[end] == "]":
+                end += 1
+            end = segment.find("]", end)
+            if end == -1:
+                regex.append(re.escape(char))
+                continue
+            body = re.sub(r"([&~|])", r"\\\1", segment[i:end].replace("\\", "\\\\"))
+            if body.startswith("!"):
+                body = "^" + body[1:]
+            elif body.startswith(("^", "[")):
+                body = "\\" + body
+            regex.append(f"[{body}]")
+            i = end + 1
+        else:
+            regex.append(re.escape(char))
+    return "".join(regex)
+
+
+def _translate_path(pattern: str) -> str:
+    """'**'를 포함할 수 있는 상대 경로 패턴을 정규식으로 변환 ('**/'는 0개 이상의 디렉토리)"""
+    parts = pattern.split("/")
+    regex = []
+    for i, part in enumerate(parts):
+        last = i == len(parts) - 1
+        if part == "**":
+            regex.append(".*" if last else "(?:.*/)?")
+        else:
+            regex.append(_translate_segment(part) + ("" if last else "/"))
+    return "".join(regex)
+
+
+class PatternSet:
+    """
+    ';'로 구분된 포함 패턴과 '!'로 시작하는 제외 패턴을 한 번만 컴파일한 집합.
+    패턴은 소스 디렉토리 기준 상대 경로('/' 구분)에 적용되며, '/'나 '**'가 없으면 바로 아래 파일만 매칭합니다.
+    glob과 동일하게 패턴에 '.'으로 시작하는 부분이 없으면 숨김 파일/디렉토리는 제외합니다.
+    제외 패턴만 있으면(예: !*.tmp) '*'를 포함 패턴으로 사용합니다.
+    """
+
+    def __init__(self, file_pattern: str):
+        includes, excludes = [], []
+        for pattern in file_pattern.split(PATTERN_SEPARATOR):
+            pattern = pattern.strip().replace(os.sep, "/")
+            if not pattern:
+                continue
+            if pattern.startswith(EXCLUDE_PREFIX):
+                excludes.append(pattern[len(EXCLUDE_PREFIX):])
+            else:
+                includes.append(pattern)
+        if excludes and not includes:
+            includes.append("*")
+
+        flags = re.DOTALL | (re.IGNORECASE if _IGNORE_CASE else 0)
+        self._include = self._compile(includes, flags)
+        self._exclude = self._compile(excludes, flags)
+        self.recursive = any("/" in pattern or "**" in pattern for pattern in includes)
+        # '**'가 없으면 패턴의 단계 수보다 깊이 내려갈 필요가 없음
+        self.max_depth = None if any("**" in pattern for pattern in includes) else max((pattern.count("/") for pattern in includes), default=0)
+        self.match_hidden = any(part.startswith(".") for pattern in includes for part in pattern.split("/"))
+
+    @staticmethod
+    def _compile(patterns: list[str], flags: int):
+        if not patterns:
+            return None
+        return re.compile("|".join(f"(?:{_translate_path(pattern)})" for pattern in patterns) + r"\Z", flags)
+
+    def _is_hidden(self, rel_path: str) -> bool:
+        return not self.match_hidden and any(part.startswith(".") for part in rel_path.split("/") if part)
+
+    def matches(self, rel_path: str) -> bool:
+        """상대 경로(예: DCIM/100CANON/IMG_0001.JPG)가 포함 패턴에 맞고 제외 패턴에 걸리지 않는지"""
+        if self._include is None or self._is_hidden(rel_path):
+            return False
+        if self._include.match(rel_path) is None:
+            return False
+        return self._exclude is None or self._exclude.match(rel_path) is None
+
+    def prune(self, rel_dir: str) -> bool:
+        """하위 디렉토리(끝에 '/' 포함)를 아예 읽지 않아도 되는지"""
+        if self._is_hidden(rel_dir):
+            return True
+        return self._exclude is not None and self._exclude.match(rel_dir) is not None
+
+
+@lru_cache(maxsize=64)
+def compile_patterns(file_pattern: str) -> PatternSet:
+    """와일드카드 패턴 문자열을 PatternSet으로 한 번만 컴파일합니다."""
+    return PatternSet(file_pattern)
+
+
+class ScanIndex:
+    """
+    디렉토리별 파일 목록을 os.scandir로 한 번만 읽어 메모리에 보관하는 스캔 인덱스.
+    캐시는 (디렉토리, mtime) 기준이라 디렉토리의 mtime이 바뀌면 해당 디렉토리만 다시 읽습니다.
+    cache=False이면 목록을 보관하지 않으므로 메모리는 가장 큰 디렉토리 하나만큼만 사용합니다.
+    '**' 등 하위 디렉토리까지 보는 패턴은 workers개 스레드로 하위 트리를 동시에 읽습니다.
+    """
+
+    def __init__(self, cache: bool = True, workers: int = DEFAULT_WALK_WORKERS):
+        self.cache = cache
+        self.workers = max(1, workers)
+        self._entries: dict[Path, tuple[int, list[str], list[str]]] = {}  # 디렉토리 -> (mtime, 파일 이름 목록, 하위 디렉토리 목록)
+
+    def list_entries(self, directory: Path) -> tuple[list[str], list[str]]:
+        """디렉토리 바로 아래의 (파일 이름 목록, 하위 디렉토리 이름 목록) (mtime이 그대로면 캐시 사용)"""
+        try:
+            mtime = os.stat(directory).st_mtime_ns
+        except OSError:
+            self._entries.pop(directory, None)
+            return [], []
+
+        cached = self._entries.get(directory)
+        if cached is not None and cached[0] == mtime:
+            return cached[1], cached[2]
+
+        names, subdirs = [], []
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_file():
+                            names.append(entry.name)
+                        elif entry.is_dir(follow_symlinks=False):
+                            subdirs.append(entry.name)
+                    except OSError:
+                        continue
+        except OSError:
+            # glob과 마찬가지로 읽을 수 없는 디렉토리는 빈 목록으로 취급
+            return [], []
+
+        if self.cache:
+            self._entries[directory] = (mtime, names, subdirs)
+        return names, subdirs
+
+    def list_files(self, directory: Path) -> list[str]:
+        """디렉토리 바로 아래의 파일 이름 목록"""
+        return self.list_entries(directory)[0]
+
+    def iter_matches(self, directory: Path, file_pattern: str) -> Iterator[Path]:
+        """패턴과 일치하는 파일 경로를 찾는 즉시 하나씩 내보냄"""
+        patterns = compile_patterns(file_pattern)
+        if not patterns.recursive:
+            for name in self.list_files(directory):
+                if patterns.matches(name):
+                    yield directory / name
+            return
+        yield from self._walk(directory, patterns)
+
+    def match_files(self, directory: Path, file_pattern: str) -> list[Path]:
+        """캐시된 목록에서 패턴과 일치하는 파일 경로 목록을 반환"""
+        return list(self.iter_matches(directory, file_pattern))
+
+    def _walk(self, root: Path, patterns: PatternSet) -> Iterator[Path]:
+        """
+        하위 트리를 여러 스레드에서 동시에 읽고, 결과는 항상 같은 순서(이름순 깊이 우선)로 내보냅니다.
+        각 디렉토리를 읽은 스레드가 곧바로 하위 디렉토리 읽기를 예약하므로, 앞쪽 결과를 처리하는 동안 뒤쪽이 미리 읽힙니다.
+        """
+        executor = ThreadPoolExecutor(max_workers=self.workers)
+
+        def scan(directory: Path, rel_dir: str, depth: int):
+            files, subdirs = self.list_entries(directory)
+            children = []
+            if patterns.max_depth is None or depth < patterns.max_depth:
+                for name in sorted(subdirs):
+                    child_rel = f"{rel_dir}{name}/"
+                    if not patterns.prune(child_rel):
+                        children.append(executor.submit(scan, directory / name, child_rel, depth + 1))
+            return directory, rel_dir, sorted(files), children
+
+        try:
+            stack = [executor.submit(scan, root, "", 0)]
+            while stack:
+                directory, rel_dir, files, children = stack.pop().result()
+                for name in files:
+                    if patterns.matches(rel_dir + name):
+                        yield directory / name
+                stack.extend(reversed(children))
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def invalidate(self, directory: Path):
+        """특정 디렉토리의 캐시를 제거"""
+        self._entries.pop(directory, None)
+
+    def rescan(self):
+        """모든 캐시를 제거하여 다음 조회 시 다시 읽도록 함"""
+        self._entries.clear()
+
+
+class ScanSnapshot:
+    """
+    한 패턴으로 찾은 파일 목록을 고정해 둔 ScanIndex 호환 객체.
+    미리보기처럼 템플릿만 바뀌어 계획을 다시 세울 때 디렉토리를 다시 읽지 않도록 씁니다. (디스크 변경은 반영되지 않음)
+    파일마다 Path를 보관하지 않고 디렉토리 기준 상대 경로 문자열만 보관합니다.
+    """
+
+    def __init__(self, file_pattern: str, files_by_directory: dict[Path, list[str]]):
+        self.file_pattern = file_pattern
+        self._files = files_by_directory  # 디렉토리 -> 상대 경로 목록 (찾은 순서)
+
+    @classmethod
+    def capture(cls, scan_index: ScanIndex, directories: list[Path], file_pattern: str, cancel_token=None) -> "ScanSnapshot":
+        """scan_index로 각 디렉토리를 한 번 읽어 스냅샷을 만듭니다."""
+        files_by_directory = {}
+        for directory in set(directories):
+            if cancel_token is not None:
+                cancel_token.check()
+            prefix_length = len(os.path.join(os.fspath(directory), ""))
+            files_by_directory[directory] = [os.fspath(file)[prefix_length:] for file in scan_index.iter_matches(directory, file_pattern)]
+        return cls(file_pattern, files_by_directory)
+
+    def iter_matches(self, directory: Path, file_pattern: str) -> Iterator[Path]:
+        if file_pattern != self.file_pattern:
+            raise ValueError(f"스냅샷은 '{self.file_pattern}' 패턴으로 만들어졌습니다: {file_pattern}")
+        for rel_path in self._files.get(directory, ()):
+            yield directory / rel_path
+
+    def match_files(self, directory: Path, file_pattern: str) -> list[Path]:
+        return list(self.iter_matches(directory, file_pattern))
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# 모듈이 저장소 최상위에 있으므로 pytest를 어디서 실행해도 import할 수 있게 함
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
@@ -0,0 +1,64 @@
+import pytest
+
+import copy_engine
+from copy_engine import CopyEngine, CopyResult, temp_path
+from pipelined_copy import PipelinedCopyEngine
+
+
+def make_pairs(tmp_path, count):
+    src_dir, dst_dir = tmp_path / "src", tmp_path / "dst"
+    src_dir.mkdir()
+    dst_dir.mkdir()
+    pairs = []
+    for index in range(count):
+        src = src_dir / f"{index}.txt"
+        src.write_bytes(b"x" * index)
+        pairs.append((src, dst_dir / f"{index}.txt"))
+    return pairs
+
+
+@pytest.mark.parametrize("engine_class", [CopyEngine, PipelinedCopyEngine])
+@pytest.mark.parametrize("durability", ["none", "batched", "strict"])
+def test_copy_all(tmp_path, engine_class, durability):
+    pairs = make_pairs(tmp_path, 40)
+    done = []
+    engine = engine_class(workers=2, on_file_done=lambda src, dst, error: done.append(dst), durability=durability)
+
+    result = engine.copy_all(pairs)
+
+    assert result.errors == []
+    assert result.copied == len(pairs)
+    assert sorted(done) == sorted(dst for _, dst in pairs)
+    assert all(dst.read_bytes() == src.read_bytes() for src, dst in pairs)
+    assert not list(pairs[0][1].parent.glob("*" + copy_engine.TEMP_SUFFIX + "*"))
+
+
+def test_batched_keeps_temp_name_until_synced(tmp_path):
+    """batched는 fsync하기 전에는 최종 이름에 파일을 두지 않음"""
+    (src, dst), = make_pairs(tmp_path, 1)
+    engine = CopyEngine(mode="copy", durability="batched")
+    result = CopyResult()
+
+    engine._copy_one(src, dst, result, None)
+    assert not dst.exists()
+    assert temp_path(dst).exists()
+
+    engine.flush(result)
+    assert result.copied == 1
+    assert dst.exists()
+    assert not temp_path(dst).exists()
+
+
+def test_batched_fsync_failure(tmp_path, monkeypatch):
+    """임시 파일을 fsync하지 못하면 최종 이름으로 바꾸지 않고 실패로 보고"""
+    pairs = make_pairs(tmp_path, 3)
+
+    def fail(path):
+        raise OSError("fsync failed")
+
+    monkeypatch.setattr(copy_engine, "fsync_path", fail)
+    result = CopyEngine(mode="copy", durability="batched").copy_all(pairs)
+
+    assert result.copied == 0
+    assert len(result.errors) == len(pairs)
+    assert not any(dst.exists() or temp_path(dst).exists() for _, dst in pairs)
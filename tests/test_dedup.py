@@ -0,0 +1,37 @@
+import hashlib
+
+from dedup import FileHasher, HashCache, find_duplicate_content
+
+
+def test_find_duplicate_content(tmp_path):
+    files = []
+    for name, content in [("a", b"same"), ("b", b"diff"), ("c", b"same"), ("d", b"")]:
+        path = tmp_path / name
+        path.write_bytes(content)
+        files.append(path)
+
+    result = find_duplicate_content(files, processes=1)
+
+    assert result.skipped == {tmp_path / "c": tmp_path / "a"}
+    assert result.bytes_saved == 4
+
+
+def test_file_hasher_uses_cache(tmp_path):
+    path = tmp_path / "a"
+    path.write_bytes(b"content")
+    missing = tmp_path / "missing"
+    cache = HashCache(tmp_path / "hashes.sqlite")
+    try:
+        hasher = FileHasher(cache, processes=1)
+        job, missing_job = hasher.request(path), hasher.request(missing)
+        assert hasher.wait_all()
+        assert job.sha256 == hashlib.sha256(b"content").hexdigest()
+        assert job.hashed
+        assert isinstance(missing_job.error, FileNotFoundError)
+
+        # 크기와 mtime이 같으면 다시 읽지 않고 캐시에서 가져옴
+        cached = FileHasher(cache, processes=1).request(path)
+        assert cached.sha256 == job.sha256
+        assert not cached.hashed
+    finally:
+        cache.close()
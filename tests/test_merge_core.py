@@ -0,0 +1,62 @@
+import random
+from datetime import datetime
+
+import pytest
+
+from merge_core import CompiledTemplate, NameAllocator, NameCollisionError, apply_template
+
+
+def allocate_all(template, names, reserved=()):
+    allocator = NameAllocator(CompiledTemplate(template, datetime(2020, 1, 2, 3, 4, 5), random.Random(0)))
+    for name in reserved:
+        allocator.reserve(name)
+    return [allocator.allocate(name) for name in names]
+
+
+def test_num_counts_per_original_name():
+    names = allocate_all("<ORIGINAL>_<NUM>", ["a.jpg", "b.jpg", "a.jpg", "a.jpg", "b.jpg"])
+    assert names == ["a_1.jpg", "b_1.jpg", "a_2.jpg", "a_3.jpg", "b_2.jpg"]
+
+
+def test_num_without_original_shares_counter_per_extension():
+    names = allocate_all("IMG_<NUM>", ["a.jpg", "b.jpg", "c.png", "d.jpg"])
+    assert names == ["IMG_1.jpg", "IMG_2.jpg", "IMG_1.png", "IMG_3.jpg"]
+
+
+def test_num_skips_reserved_and_rendered_collisions():
+    # 원래 이름을 유지하는 'a_1.jpg'와, 다른 원본에서 만들어진 'a_1_1.jpg'를 피해야 함
+    names = allocate_all("<ORIGINAL>_<NUM>", ["a.jpg", "a_1.jpg", "a.jpg", "a.jpg"], reserved=["a_1.jpg"])
+    assert names == ["a_2.jpg", "a_1_1.jpg", "a_3.jpg", "a_4.jpg"]
+    assert len(set(names) | {"a_1.jpg"}) == 5
+
+
+def test_num_with_rand_keeps_counting():
+    names = allocate_all("x_<NUM>_<RAND>", ["a.jpg", "a.jpg", "a.jpg"])
+    assert [name.split("_")[1] for name in names] == ["1", "2", "3"]
+
+
+def test_rand_only_collision_raises():
+    class FixedRandom(random.Random):
+        def choices(self, population, k=1, **kwargs):
+            return ["a"] * k
+
+    allocator = NameAllocator(CompiledTemplate("<RAND>", rng=FixedRandom()))
+    assert allocator.allocate("x.jpg") == "aaaaaa.jpg"
+    with pytest.raises(NameCollisionError):
+        allocator.allocate("y.jpg")
+
+
+def test_apply_template_names_are_unique(tmp_path):
+    directories = []
+    for index in range(3):
+        directory = tmp_path / f"d{index}"
+        directory.mkdir()
+        for name in ["a.jpg", "a_1.jpg", f"only{index}.jpg"]:
+            (directory / name).touch()
+        directories.append(directory)
+
+    plan = apply_template(directories, "<ORIGINAL>", False, "*.jpg")
+
+    new_names = list(plan.values())
+    assert len(new_names) == len(set(new_names)) == 9
+    assert plan[tmp_path / "d0" / "only0.jpg"] == "only0.jpg"
@@ -0,0 +1,36 @@
+import io
+import pstats
+from concurrent.futures import ThreadPoolExecutor
+
+from merge_cli import load_plan
+from merge_events import EventBus, MergeStats, profile_run
+from merge_plan import MergePlan
+
+
+def busy_worker(n):
+    return sum(range(n))
+
+
+def test_profile_run_includes_worker_threads(tmp_path):
+    """작업 스레드에서 실행된 함수도 프로파일 결과에 들어가야 함"""
+    profile_path = tmp_path / "run.prof"
+    with profile_run(profile_path, stream=io.StringIO()):
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            list(executor.map(busy_worker, [1000] * 4))
+
+    functions = {name for _, _, name in pstats.Stats(str(profile_path)).stats}
+    assert "busy_worker" in functions
+
+
+def test_load_plan_reports_plan_size(tmp_path):
+    """--load-plan도 plan_built를 보내 진행률이 전체 파일 수를 알아야 함"""
+    plan_path = tmp_path / "plan.gz"
+    MergePlan.from_pairs([(tmp_path / "a.txt", "a.txt"), (tmp_path / "b.txt", "b.txt")]).save(plan_path)
+    bus = EventBus()
+    stats = MergeStats()
+    bus.subscribe(stats)
+
+    plan = load_plan(plan_path, bus)
+
+    assert len(plan) == 2
+    assert stats.total_files == 2
@@ -0,0 +1,52 @@
+import os
+
+from copy_engine import temp_path
+from merge_core import resume_merge
+from merge_journal import MergeJournal
+
+
+def make_sources(directory, names):
+    directory.mkdir()
+    for name in names:
+        (directory / name).write_text(name)
+    return [directory / name for name in names]
+
+
+def test_resume_interrupted_move(tmp_path):
+    """완료 기록이 커밋되기 전에 끊긴 move는 원본이 없어도 이어서 끝낼 수 있어야 함"""
+    sources = make_sources(tmp_path / "src", ["a.txt", "b.txt", "c.txt"])
+    target = tmp_path / "target"
+    target.mkdir()
+    journal = MergeJournal(target)
+    journal.write_plan([(source, f"{index}.txt") for index, source in enumerate(sources)])
+    journal.close()
+
+    # a는 이동을 마쳤지만 기록되지 않았고, b는 임시 파일까지만 옮겨졌고, c는 시작하지 않음
+    os.replace(sources[0], target / "0.txt")
+    os.replace(sources[1], temp_path(target / "1.txt"))
+
+    result = resume_merge(target, mode="move")
+
+    assert result.errors == []
+    assert result.copied == 1
+    assert [(target / f"{index}.txt").read_text() for index in range(3)] == ["a.txt", "b.txt", "c.txt"]
+    assert not any(source.exists() for source in sources)
+    assert not MergeJournal.exists(target)
+
+
+def test_resume_recopies_changed_target(tmp_path):
+    """완료로 기록된 파일도 대상이 바뀌었으면 원본이 남아 있는 한 다시 복사"""
+    sources = make_sources(tmp_path / "src", ["a.txt"])
+    target = tmp_path / "target"
+    target.mkdir()
+    journal = MergeJournal(target)
+    ids = journal.write_plan([(sources[0], "0.txt")])
+    (target / "0.txt").write_text("a.txt")
+    journal.mark_done(ids["0.txt"], target / "0.txt")
+    journal.close()
+    (target / "0.txt").write_text("changed")
+
+    result = resume_merge(target, mode="copy")
+
+    assert result.copied == 1
+    assert (target / "0.txt").read_text() == "a.txt"
@@ -0,0 +1,61 @@
+import gzip
+import io
+import os
+from pathlib import Path
+
+import pytest
+
+from merge_plan import FIELD_SEPARATOR, MergePlan, _iter_fields
+
+# UTF-8로 디코딩할 수 없는 이름은 surrogateescape로 str이 됨
+UNDECODABLE_DIR = Path(os.fsdecode(b"/src/\xff\xfedir"))
+PAIRS = [
+    (Path("/src/a/IMG_0001.jpg"), "IMG_0001_1.jpg"),
+    (Path("/src/a/same.jpg"), "same.jpg"),
+    (UNDECODABLE_DIR / os.fsdecode(b"\xff\xfe.jpg"), os.fsdecode(b"\xff\xfe_1.jpg")),
+    (UNDECODABLE_DIR / "ok.jpg", "ok.jpg"),
+    (Path("/src/b/사진 1.jpg"), "사진 1_2.jpg"),
+]
+
+
+def test_save_load_round_trip(tmp_path):
+    plan = MergePlan.from_pairs(PAIRS)
+    plan.save(tmp_path / "plan.gz")
+
+    loaded = MergePlan.load(tmp_path / "plan.gz")
+
+    assert list(loaded.items()) == PAIRS
+    assert loaded[PAIRS[2][0]] == PAIRS[2][1]
+    assert PAIRS[3][0] in loaded
+    assert loaded.same_sources(plan)
+    assert loaded.changed_rows(plan) == []
+
+
+def test_iter_fields_across_chunks():
+    data = FIELD_SEPARATOR.encode().join([b"abc", b"", b"\xff\xfe", b"last"])
+    assert list(_iter_fields(io.BytesIO(data), chunk_size=2)) == [b"abc", b"", b"\xff\xfe", b"last"]
+
+
+def test_load_rejects_bad_files(tmp_path):
+    not_gzip = tmp_path / "plain.txt"
+    not_gzip.write_text("hello")
+    with pytest.raises(ValueError):
+        MergePlan.load(not_gzip)
+
+    MergePlan.from_pairs(PAIRS).save(tmp_path / "plan.gz")
+    with gzip.open(tmp_path / "plan.gz", "rb") as f:
+        data = f.read()
+    with gzip.open(tmp_path / "truncated.gz", "wb") as f:
+        f.write(data[:len(data) // 2])
+    with pytest.raises(ValueError):
+        MergePlan.load(tmp_path / "truncated.gz")
+
+
+def test_changed_rows(tmp_path):
+    plan = MergePlan.from_pairs(PAIRS)
+    renamed = MergePlan.from_pairs([(source, os.fsdecode(b"\xff" + os.fsencode(name)) if index in (1, 2) else name)
+                                    for index, (source, name) in enumerate(PAIRS)])
+
+    assert renamed.changed_rows(plan) == [1, 2]
+    assert renamed.changed_rows(None) is None
+    assert MergePlan.from_pairs(PAIRS[:-1]).changed_rows(plan) is None
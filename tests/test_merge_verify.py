@@ -0,0 +1,70 @@
+import hashlib
+import os
+import shutil
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from merge_core import merge_files
+from merge_verify import CopyVerifier, read_manifest, verify_manifest, write_manifest
+
+NAMES = ["plain.txt", "with space.txt", "back\\slash.txt", "new\nline.txt", os.fsdecode(b"\xff\xfe.txt"), "사진.txt"]
+needs_sha256sum = pytest.mark.skipif(shutil.which("sha256sum") is None or sys.platform == "win32", reason="GNU sha256sum 필요")
+
+
+def write_files(directory: Path) -> dict[str, str]:
+    directory.mkdir()
+    hashes = {}
+    for index, name in enumerate(NAMES):
+        data = f"{index}:{name}".encode("utf-8", "surrogateescape")
+        (directory / name).write_bytes(data)
+        hashes[name] = hashlib.sha256(data).hexdigest()
+    return hashes
+
+
+def test_write_read_round_trip(tmp_path):
+    hashes = write_files(tmp_path / "files")
+    manifest = tmp_path / "files" / "SHA256SUMS"
+    entries = [(name, hashes[name], Path("/src") / name if index % 2 else None) for index, name in enumerate(NAMES)]
+
+    write_manifest(manifest, entries)
+
+    assert list(read_manifest(manifest)) == entries
+
+
+@needs_sha256sum
+def test_manifest_lines_match_sha256sum(tmp_path):
+    directory = tmp_path / "files"
+    hashes = write_files(directory)
+    manifest = directory / "SHA256SUMS"
+    write_manifest(manifest, [(name, hashes[name], Path("/src") / name) for name in sorted(NAMES)])
+
+    expected = subprocess.run(["sha256sum", "--", *sorted(os.fsencode(name) for name in NAMES)],
+                              cwd=directory, capture_output=True, check=True).stdout
+    written = b"".join(line for line in manifest.read_bytes().splitlines(keepends=True) if not line.startswith(b"#"))
+    assert sorted(written.splitlines()) == sorted(expected.splitlines())
+
+
+@needs_sha256sum
+def test_copy_verification_and_check(tmp_path):
+    write_files(tmp_path / "src")
+    target = tmp_path / "target"
+    manifest = target / ".mergefile.sha256"
+
+    # 이름이 겹치지 않으므로 원래 이름 그대로 복사됨
+    result = merge_files([tmp_path / "src"], target, "<ORIGINAL>", False, "*", verifier=CopyVerifier(manifest, processes=1))
+
+    assert result.errors == []
+    assert result.verification.verified == len(NAMES)
+    assert subprocess.run(["sha256sum", "-c", "--quiet", manifest.name], cwd=target).returncode == 0
+
+    # 다른 작업 디렉토리에서 확인해도 목록 기준으로 대상과 원본을 찾음
+    check = verify_manifest(manifest, processes=1)
+    assert (check.verified, check.failed) == (len(NAMES), 0)
+
+    (target / NAMES[2]).write_bytes(b"tampered")
+    check = verify_manifest(manifest, processes=1)
+    assert check.mismatched == [(tmp_path.resolve() / "src" / NAMES[2], target / NAMES[2])]
+    assert subprocess.run(["sha256sum", "-c", "--quiet", manifest.name], cwd=target, capture_output=True).returncode != 0
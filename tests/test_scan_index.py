@@ -0,0 +1,67 @@
+import glob
+import os
+from fnmatch import fnmatchcase
+
+import pytest
+
+from scan_index import PatternSet, ScanIndex
+
+NAMES = ["a.jpg", "b.JPG", "ab.png", "]x", "!x", "^x", "-x", "x*", "x[", "x[y]", "a\\b", "[]", "cat.tar.gz", "noext"]
+SEGMENT_PATTERNS = [
+    "*", "*.jpg", "?.jpg", "*.*", "[ab]*", "[!a]*", "[]]*", "[!]]*", "[]x]x", "[^x]x", "[-x]x", "x[*]",
+    "x[", "x[[]", "*[", "[a-c]*", "[!a-c]*", "a\\b", "a[\\]b", "[[]]", "*.tar.*",
+]
+
+
+@pytest.mark.parametrize("pattern", SEGMENT_PATTERNS)
+def test_segment_matches_fnmatch(pattern):
+    patterns = PatternSet(pattern)
+    for name in NAMES:
+        assert patterns.matches(name) == fnmatchcase(name, pattern), (pattern, name)
+
+
+TREE = [
+    "a.jpg", "b.txt", ".hidden.jpg",
+    "sub/c.jpg", "sub/d.txt", "sub/deep/e.jpg", "sub/deep/f.txt",
+    "thumbs/t.jpg", "sub/thumbs/u.jpg", ".git/g.jpg", "sub/.cache/h.jpg",
+]
+
+
+@pytest.fixture
+def tree(tmp_path):
+    for rel_path in TREE:
+        path = tmp_path / rel_path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.touch()
+    return tmp_path
+
+
+def scan(root, pattern):
+    return sorted(path.relative_to(root).as_posix() for path in ScanIndex(cache=False).iter_matches(root, pattern))
+
+
+@pytest.mark.parametrize("pattern", ["*", "*.jpg", "**/*.jpg", "sub/*.jpg", "*/*.txt", "sub/**/*.txt", "**", "sub/**", ".*", "**/.*"])
+def test_recursive_matches_glob(tree, pattern):
+    expected = sorted(
+        path.replace(os.sep, "/") for path in glob.glob(pattern, root_dir=tree, recursive=True)
+        if (tree / path).is_file()
+    )
+    assert scan(tree, pattern) == expected
+
+
+def test_multiple_and_exclude_patterns(tree):
+    assert scan(tree, "*.jpg;*.txt") == ["a.jpg", "b.txt"]
+    assert scan(tree, "**/*.jpg;!**/thumbs/**") == ["a.jpg", "sub/c.jpg", "sub/deep/e.jpg"]
+
+
+def test_exclude_only_pattern_includes_everything_else(tree):
+    assert scan(tree, "!*.txt") == ["a.jpg"]
+
+
+def test_prune_excluded_and_hidden_directories():
+    patterns = PatternSet("**/*.jpg;!**/thumbs/**")
+    assert patterns.prune("thumbs/")
+    assert patterns.prune("sub/thumbs/")
+    assert patterns.prune(".git/")
+    assert not patterns.prune("sub/")
+    assert not PatternSet("**/.*").prune(".git/")
@@ -0,0 +1,181 @@
+import tkinter as tk
+import tkinter.font as tkfont
+from bisect import bisect_left
+from collections.abc import Sequence
+from typing import Callable
+
+
+class MappedRows(Sequence):
+    """원본 목록의 항목을 화면에 표시할 때만 문자열로 바꾸는 지연 시퀀스"""
+
+    def __init__(self, items: Sequence, to_text: Callable[[object], str]):
+        self.items = items
+        self.to_text = to_text
+
+    def __len__(self):
+        return len(self.items)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self.to_text(item) for item in self.items[index]]
+        return self.to_text(self.items[index])
+
+
+class VirtualListbox(tk.Listbox):
+    """
+    전체 행은 메모리의 시퀀스에 두고, 화면에 보이는 행만 Listbox에 넣는 가상 리스트박스.
+    yview/yview_scroll/see/size/curselection/selection_set/selection_clear/get은 전체 행 기준 인덱스를 사용하므로
+    일반 Listbox처럼 스크롤 동기화 코드를 그대로 쓸 수 있습니다.
+    """
+
+    def __init__(self, master=None, yscrollcommand: Callable[[str, str], None] | None = None, **kwargs):
+        super().__init__(master, **kwargs)
+        self._rows: Sequence[str] = []
+        self._top = 0  # 화면 맨 위 행의 전체 인덱스
+        self._selected: int | None = None  # 선택된 행의 전체 인덱스
+        self._yscrollcommand = yscrollcommand
+        self._line_height = tkfont.Font(font=self.cget("font")).metrics("linespace") + 1
+
+        self.bind("<Configure>", lambda e: self._render())
+        self.bind("<<ListboxSelect>>", self._on_select)
+        # 기본 Listbox 클래스 바인딩은 보이는 행만 가진 내부 Listbox를 스크롤하므로 전체 행 기준으로 다시 연결
+        self.bind("<MouseWheel>", lambda e: self._scroll_event(-1 * (e.delta // 120), "units"))
+        self.bind("<Button-4>", lambda e: self._scroll_event(-1, "units"))  # X11 휠 위로
+        self.bind("<Button-5>", lambda e: self._scroll_event(1, "units"))  # X11 휠 아래로
+        self.bind("<Prior>", lambda e: self._scroll_event(-1, "pages"))
+        self.bind("<Next>", lambda e: self._scroll_event(1, "pages"))
+        self.bind("<Home>", lambda e: self._scroll_event(-len(self._rows), "units"))
+        self.bind("<End>", lambda e: self._scroll_event(len(self._rows), "units"))
+
+    def config(self, cnf=None, **kwargs):
+        # 스크롤바에는 내부 Listbox가 아니라 전체 행 기준 위치를 알려야 함
+        if "yscrollcommand" in kwargs:
+            self._yscrollcommand = kwargs.pop("yscrollcommand")
+            self._render()
+            if cnf is None and not kwargs:
+                return None
+        return super().config(cnf, **kwargs)
+
+    configure = config
+
+    def set_rows(self, rows: Sequence[str]):
+        """표시할 전체 행을 교체 (행 수와 관계없이 보이는 행만 그림)"""
+        self._rows = rows
+        self._selected = None
+        self._top = min(self._top, self._max_top())
+        self._render()
+
+    def replace_rows(self, rows: Sequence[str], changed: list[int]):
+        """
+        행 수는 그대로이고 일부 행만 바뀌었을 때 행 시퀀스를 교체합니다.
+        스크롤 위치와 선택은 유지하고, 바뀐 행 중 화면에 보이는 행만 다시 그립니다.
+        :param changed: 바뀐 행의 전체 인덱스 (오름차순)
+        """
+        if len(rows) != len(self._rows):
+            self.set_rows(rows)
+            return
+        self._rows = rows
+        count = self.visible_count()
+        first, last = bisect_left(changed, self._top), bisect_left(changed, self._top + count)
+        for index in changed[first:last]:
+            position = index - self._top
+            if position >= super().size():
+                break
+            super().delete(position)
+            super().insert(position, rows[index])
+            if index == self._selected:
+                super().selection_set(position)
+
+    def refresh(self):
+        """행 내용이 바뀌었을 때 보이는 행만 다시 그림"""
+        self._render()
+
+    def visible_count(self) -> int:
+        height = self.winfo_height() - 2 * (int(self.cget("borderwidth")) + int(self.cget("highlightthickness")))
+        return max(1, height // self._line_height)
+
+    def _max_top(self) -> int:
+        return max(0, len(self._rows) - self.visible_count())
+
+    def _render(self):
+        count = self.visible_count()
+        super().delete(0, tk.END)
+        window = self._rows[self._top:self._top + count]
+        if window:
+            super().insert(tk.END, *window)
+        if self._selected is not None and self._top <= self._selected < self._top + count:
+            super().selection_set(self._selected - self._top)
+
+        if self._yscrollcommand:
+            first, last = self.yview()
+            self._yscrollcommand(str(first), str(last))
+
+    def _scroll_to(self, top: int):
+        top = max(0, min(top, self._max_top()))
+        if top != self._top:
+            self._top = top
+            self._render()
+
+    def _scroll_event(self, number: int, what: str) -> str:
+        self.yview_scroll(number, what)
+        return "break"
+
+    def _on_select(self, event):
+        selection = super().curselection()
+        if selection:
+            self._selected = self._top + selection[0]
+
+    # --- 전체 행 기준으로 동작하는 Listbox 호환 메서드 ---
+
+    def size(self) -> int:
+        return len(self._rows)
+
+    def _index(self, index) -> int:
+        """tk.END("end")를 전체 행 기준 마지막 인덱스로 바꿈"""
+        if index == tk.END:
+            return len(self._rows) - 1
+        return int(index)
+
+    def get(self, first, last=None):
+        if last is None:
+            return self._rows[self._index(first)]
+        return tuple(self._rows[self._index(first):self._index(last) + 1])
+
+    def delete(self, first, last=None):
+        # 미리보기는 항상 전체를 지우므로 전체 삭제만 지원
+        self.set_rows([])
+
+    def yview(self, *args):
+        total = len(self._rows)
+        if not args:
+            if total == 0:
+                return 0.0, 1.0
+            return self._top / total, min(1.0, (self._top + self.visible_count()) / total)
+
+        if args[0] == "moveto":
+            self._scroll_to(int(float(args[1]) * total))
+        elif args[0] == "scroll":
+            self.yview_scroll(int(args[1]), args[2])
+        return None
+
+    def yview_scroll(self, number, what):
+        step = self.visible_count() if what == "pages" else 1
+        self._scroll_to(self._top + int(number) * step)
+
+    def see(self, index):
+        count = self.visible_count()
+        if index < self._top:
+            self._scroll_to(index)
+        elif index >= self._top + count:
+            self._scroll_to(index - count + 1)
+
+    def curselection(self):
+        return () if self._selected is None else (self._selected,)
+
+    def selection_set(self, first, last=None):
+        self._selected = first
+        self._render()
+
+    def selection_clear(self, first, last=None):
+        self._selected = None
+        super().selection_clear(0, tk.END)